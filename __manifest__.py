@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'MDA Nigerian HR Extension',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.1',
     'category': 'Human Resources',
     'summary': 'Nigerian-specific HR extensions for employee management',
     'description': """
@@ -29,13 +29,27 @@ Features:
     'data': [
         'security/hr_security.xml',
         'data/pfa_partners.xml',
+        'data/pfa_partner_data.xml',
         'security/report_security.xml',
         'security/ir.model.access.csv',
+        'data/grade_level_data.xml',
+        'data/ir_cron_data.xml',
+        'data/workforce_kpi_data.xml',
+        'data/employee_snapshot_data.xml',
         'views/hr_employee_views.xml',
         'views/promotion_history_views.xml',
         'views/promotion_reports.xml',
+        'views/promotion_schedule_views.xml',
+        'views/workforce_projection_views.xml',
         'views/promotion_pdf_reports.xml',
         'views/hr_report_templates.xml',
+        'views/employee_import_views.xml',
+        'views/staff_duplicate_views.xml',
+        'views/grade_level_views.xml',
+        'views/establishment_views.xml',
+        'views/hr_report_wizard_views.xml',
+        'views/workforce_kpi_views.xml',
+        'views/profile_log_views.xml',
         'views/views.xml',
     ],
     'demo': [],
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic workforce benchmarks
+Generates realistic nominal rolls (grades, states, qualifications, PFAs, promotion histories) and
+times the module's hot paths on them, recording wall time, SQL query count and peak Python memory
+of each step to a JSON file that can be compared across module versions.
+
+Run from an Odoo shell on a scratch database with the module installed:
+
+    from odoo.addons.mda_hr.benchmark import run_benchmarks, compare_benchmarks
+    run_benchmarks(env, sizes=(10000, 100000), output='/tmp/mda_hr_benchmark.json')
+    compare_benchmarks('/tmp/mda_hr_benchmark_old.json', '/tmp/mda_hr_benchmark.json')
+
+Each size runs in a savepoint that is rolled back, so the database is left as it was.
+"""
+
+import gc
+import json
+import logging
+import platform
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from odoo import release
+from odoo.tools import split_every
+
+from .constants import SALARY_GRADE_LEVELS, NIGERIAN_STATES
+
+_logger = logging.getLogger(__name__)
+
+BENCHMARK_SIZES = (10000, 100000, 500000)
+BENCHMARK_SEED = 2024
+
+# Steps slower (or using more queries) than the baseline by this factor are regressions
+REGRESSION_FACTOR = 1.25
+# Steps faster than this in the baseline are too noisy to compare
+MIN_COMPARED_SECONDS = 0.05
+
+DEPARTMENT_COUNT = 40
+DEPARTMENT_PREFIX = 'Benchmark Department'
+# Approved posts per department and grade, as a share of the expected headcount
+ESTABLISHMENT_HEADROOM = 1.1
+
+# Stored computes of hr.employee recomputed by the "recompute" steps
+RECOMPUTED_FIELDS = [
+    'retirement_date', 'age_on_entry', 'qualification_level', 'pfa_partner_id',
+    'geo_political_zone', 'next_promotion_due', 'is_confirmed', 'is_promotion_due',
+]
+
+REPORT_TYPES = ['master', 'pension', 'retirement', 'geographical', 'qualification']
+
+HISTORY_CHUNK_SIZE = 10000
+
+# Eligibility is checked record by record on this many employees (form view, approval)
+ELIGIBILITY_SAMPLE_SIZE = 200
+
+SURNAMES = [
+    'ADEYEMI', 'OKAFOR', 'BELLO', 'IBRAHIM', 'OKONKWO', 'ABUBAKAR', 'EZE', 'OLADIPO', 'MUSA',
+    'NWOSU', 'ADEBAYO', 'YUSUF', 'OKEKE', 'ABDULLAHI', 'ADEWALE', 'UMAR', 'OBI', 'SULEIMAN',
+    'OGUNLEYE', 'DANJUMA', 'EKPO', 'ETIM', 'AKPAN', 'BASSEY', 'OYELARAN', 'LAWAL', 'CHUKWU',
+    'ALIYU', 'OGUNDIPE', 'NWACHUKWU', 'SANI', 'OLAWALE', 'IDRIS', 'ANYANWU', 'GARBA', 'OJO',
+]
+FIRST_NAMES = [
+    'CHINEDU', 'AMINA', 'OLUWASEUN', 'FATIMA', 'EMEKA', 'HAUWA', 'TUNDE', 'NGOZI', 'ABDULRAHMAN',
+    'FUNMILAYO', 'IBRAHIM', 'BLESSING', 'SEGUN', 'ZAINAB', 'IFEANYI', 'AISHA', 'KEHINDE', 'UCHE',
+    'MOHAMMED', 'YETUNDE', 'CHIAMAKA', 'SULE', 'GRACE', 'ADAMU', 'CHIOMA', 'BABATUNDE', 'HALIMA',
+]
+RANKS = [
+    'Clerical Officer', 'Executive Officer', 'Higher Executive Officer', 'Administrative Officer',
+    'Senior Nursing Officer', 'Medical Officer', 'Pharmacist', 'Laboratory Scientist',
+    'Principal Accountant', 'Assistant Director', 'Deputy Director', 'Director',
+]
+# Free-text spellings as they appear on submitted rolls
+QUALIFICATIONS = [
+    'SSCE', 'WASC', 'OND', 'ND', 'HND', 'H.N.D (ACCT)', 'B.Sc', 'BSC', 'B.SC ED', 'B.A', 'LLB, BL',
+    'MBBS', 'B.PHARM', 'PGD', 'MBA', 'M.Sc', 'MSC, BSC', 'PhD', 'MBBS, FWACS', 'RN, RM', 'FSLC', '',
+]
+PFA_NAMES = [
+    'STANBIC IBTC PENSION MANAGERS', 'ARM PENSION', 'PREMIUM PENSION LTD', 'LEADWAY PENSURE',
+    'FIDELITY PENSION MANAGERS', 'CRUSADER STERLING PENSIONS', 'NLPC PFA', 'TRUSTFUND PENSIONS',
+    'PAL PENSIONS', 'NIL', '',
+]
+APPOINTMENT_TYPES = ['Permanent'] * 17 + ['Contract', 'Temporary', 'Casual']
+EMPLOYEE_STATUSES = ['active'] * 46 + ['retired', 'suspended', 'inactive', 'deceased']
+
+
+def _random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange(max((end - start).days, 1)))
+
+
+def generate_roll(size, seed=BENCHMARK_SEED, today=None, department_count=DEPARTMENT_COUNT):
+    """
+    Yield `size` raw nominal roll rows (as read from a roll file) with unique identifiers.
+    The same size and seed always give the same roll.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    grades = [label for _code, label in SALARY_GRADE_LEVELS]
+    # Most staff sit in the middle grades
+    grade_weights = [min(index + 1, len(grades) - index) for index in range(len(grades))]
+    states = [label for _code, label in NIGERIAN_STATES]
+    for number in range(1, size + 1):
+        birthday = _random_date(rng, date(today.year - 59, 1, 1), date(today.year - 21, 1, 1))
+        first_appointment = _random_date(
+            rng, birthday + timedelta(days=21 * 365), min(birthday + timedelta(days=38 * 365), today))
+        present_appointment = _random_date(rng, first_appointment, today)
+        yield {
+            'file_number': 'BM/%07d' % number,
+            'ippis': str(1000000 + number),
+            'surname': rng.choice(SURNAMES),
+            'first_name': rng.choice(FIRST_NAMES),
+            'middle_name': rng.choice(FIRST_NAMES) if rng.random() < 0.6 else '',
+            'birthday': birthday,
+            'gender': rng.choice(('Male', 'Female')),
+            'department': '%s %02d' % (DEPARTMENT_PREFIX, rng.randrange(department_count) + 1),
+            'rank': rng.choice(RANKS),
+            'salary_grade_level': rng.choices(grades, grade_weights)[0],
+            'appointment_type': rng.choice(APPOINTMENT_TYPES),
+            'date_first_appointment': first_appointment,
+            'date_present_appointment': present_appointment,
+            'pfa_name': rng.choice(PFA_NAMES),
+            'rsa_pin': 'PEN%012d' % (100000000000 + number) if rng.random() < 0.9 else '',
+            'state_of_origin': rng.choice(states),
+            'lga': '',
+            'employee_status': rng.choice(EMPLOYEE_STATUSES),
+            'qualification': rng.choice(QUALIFICATIONS),
+        }
+
+
+class BenchmarkRecorder:
+    """Measures steps of one benchmark run and collects their results."""
+
+    def __init__(self, env, trace_memory=True):
+        self.env = env
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextmanager
+    def step(self, name, size, rows=None):
+        """Record wall time, SQL queries and peak traced memory of the block, from a cold cache"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        queries = self.env.cr.sql_log_count
+        started = time.perf_counter()
+        try:
+            yield
+            self.env.flush_all()
+        finally:
+            duration = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if self.trace_memory:
+                tracemalloc.stop()
+        result = {
+            'step': name,
+            'size': size,
+            'rows': rows,
+            'seconds': round(duration, 4),
+            'queries': self.env.cr.sql_log_count - queries,
+            'peak_memory_kb': peak // 1024 if peak is not None else None,
+        }
+        self.results.append(result)
+        _logger.info("Benchmark %s (%s employees): %.2fs, %s queries, %s KiB peak",
+                     name, size, duration, result['queries'], result['peak_memory_kb'])
+
+
+def _prepare_organisation(env, department_count, size):
+    """Departments and grade establishment of the synthetic roll; returns the departments"""
+    Department = env['hr.department']
+    names = ['%s %02d' % (DEPARTMENT_PREFIX, number) for number in range(1, department_count + 1)]
+    existing = Department.search([('name', 'in', names)])
+    departments = existing | Department.create([
+        {'name': name} for name in sorted(set(names) - set(existing.mapped('name')))
+    ])
+    grade_levels = env['mda.hr.grade.level'].search([])
+    if not grade_levels:
+        grade_levels = env['mda.hr.grade.level']._seed_from_constants()
+    posts = max(int(size * ESTABLISHMENT_HEADROOM / department_count / len(grade_levels)), 1)
+    Establishment = env['mda.hr.establishment']
+    lines = {(line.department_id.id, line.grade_level_id.id) for line in Establishment.search([
+        ('department_id', 'in', departments.ids),
+    ])}
+    Establishment.create([
+        {'department_id': department.id, 'grade_level_id': grade_level.id, 'approved_posts': posts}
+        for department in departments for grade_level in grade_levels
+        if (department.id, grade_level.id) not in lines
+    ])
+    return departments
+
+
+def _set_eligibility_inputs(env, employee_ids, seed):
+    """
+    Give the roll confirmation dates, exam results and disciplinary cases. Written with one
+    UPDATE per flag: the stored computes depending on them are recomputed by the next steps.
+    """
+    rng = random.Random(seed)
+    confirmed = [employee_id for employee_id in employee_ids if rng.random() < 0.7]
+    passed = [employee_id for employee_id in employee_ids if rng.random() < 0.6]
+    disciplined = [employee_id for employee_id in employee_ids if rng.random() < 0.03]
+    env.cr.execute("""
+        UPDATE hr_employee
+           SET date_confirmed = date_present_appointment + INTERVAL '2 years'
+         WHERE id = ANY(%s) AND date_present_appointment + INTERVAL '2 years' <= CURRENT_DATE
+    """, [confirmed])
+    env.cr.execute("UPDATE hr_employee SET passed_promotion_exam = TRUE WHERE id = ANY(%s)", [passed])
+    env.cr.execute("UPDATE hr_employee SET has_disciplinary_case = TRUE WHERE id = ANY(%s)", [disciplined])
+    env.invalidate_all(flush=False)
+
+
+def _promotion_history_vals(env, employee_ids, seed):
+    """Past implemented promotions for about half the roll, and a draft promotion to the next grade for a tenth"""
+    rng = random.Random(seed)
+    env.cr.execute("""
+        SELECT id, salary_grade_level, rank, date_first_appointment, date_present_appointment
+          FROM hr_employee
+         WHERE id = ANY(%s) AND salary_grade_level IS NOT NULL AND date_present_appointment IS NOT NULL
+    """, [employee_ids])
+    rows = env.cr.fetchall()
+    # Open promotions go to the next grade level (see _check_new_grade_level)
+    next_grades = env['mda.hr.grade.level']._get_next_grade_codes({row[1] for row in rows})
+    today = date.today()
+    vals_list = []
+    for employee_id, grade, rank, first_appointment, present_appointment in rows:
+        if first_appointment and first_appointment < present_appointment and rng.random() < 0.5:
+            for _number in range(rng.randint(1, 3)):
+                vals_list.append({
+                    'employee_id': employee_id,
+                    'new_salary_grade_level': grade,
+                    'new_rank': rank or RANKS[0],
+                    'effective_date': _random_date(rng, first_appointment, present_appointment),
+                    'state': 'implemented',
+                })
+        if rng.random() < 0.1 and grade in next_grades:
+            vals_list.append({
+                'employee_id': employee_id,
+                'new_salary_grade_level': next_grades[grade],
+                'new_rank': rank or RANKS[0],
+                'effective_date': date(today.year, 1, 1),
+                'state': 'draft',
+            })
+    return vals_list
+
+
+def benchmark_roll(env, size, recorder, seed=BENCHMARK_SEED, chunk_size=None):
+    """Load a synthetic roll of `size` employees and time each hot path on it"""
+    Employee = env['hr.employee']
+    employees_model = Employee.with_context(tracking_disable=True)
+    _prepare_organisation(env, DEPARTMENT_COUNT, size)
+
+    import_kwargs = {'chunk_size': chunk_size} if chunk_size else {}
+    with recorder.step('bulk_import', size, rows=size):
+        stats = employees_model._bulk_import_rows(generate_roll(size, seed), **import_kwargs)
+    if stats['rejected']:
+        _logger.warning("Benchmark roll: %s rows rejected, first: %s", stats['rejected'], stats['rejects'][:3])
+
+    env.cr.execute("SELECT id FROM hr_employee WHERE file_number LIKE %s ORDER BY id", ['BM/%'])
+    employee_ids = [row[0] for row in env.cr.fetchall()]
+    _set_eligibility_inputs(env, employee_ids, seed)
+
+    history_vals = _promotion_history_vals(env, employee_ids, seed)
+    with recorder.step('promotion_history_create', size, rows=len(history_vals)):
+        Promotion = env['mda.hr.promotion.history'].with_context(tracking_disable=True)
+        for vals_list in split_every(HISTORY_CHUNK_SIZE, history_vals, list):
+            Promotion.create(vals_list)
+
+    employees = Employee.browse(employee_ids)
+    for fname in RECOMPUTED_FIELDS:
+        with recorder.step('recompute:%s' % fname, size, rows=len(employee_ids)):
+            env.add_to_compute(Employee._fields[fname], employees)
+            Employee.flush_model([fname])
+
+    ReportPrint = env['mda_hr.employee.report.print']
+    for report_type in REPORT_TYPES:
+        with recorder.step('report:%s' % report_type, size):
+            ReportPrint._compute_report_values(report_type, {'report_type': report_type})
+
+    PromotionReport = env['mda.promotion.report']
+    with recorder.step('promotion_report:refresh', size):
+        PromotionReport._refresh_view()
+    with recorder.step('promotion_report:group', size):
+        PromotionReport._read_group([], ['promotion_state'], ['__count'])
+    EligibilityReport = env['mda.promotion.eligibility.report']
+    with recorder.step('eligibility_report:group', size):
+        EligibilityReport._read_group([], ['overall_eligible'], ['__count'])
+    with recorder.step('eligibility_report:first_page', size, rows=80):
+        EligibilityReport.search_read([], ['employee_name', 'eligibility_percentage'], limit=80)
+
+    schedule = env['mda.hr.promotion.schedule'].create({
+        'name': 'Benchmark Screening',
+        'promotion_year': date.today().year,
+    })
+    with recorder.step('screening:full', size):
+        schedule.compute_eligible_employees(incremental=False)
+    with recorder.step('screening:incremental', size):
+        schedule.compute_eligible_employees()
+
+    active = Employee.search([('file_number', '=like', 'BM/%'), ('employee_status', '=', 'active')])
+    with recorder.step('eligibility:map', size, rows=len(active)):
+        active._get_promotion_eligibility_map()
+    sample = active[:ELIGIBILITY_SAMPLE_SIZE]
+    with recorder.step('eligibility:per_employee', size, rows=len(sample)):
+        for employee in sample:
+            employee.check_promotion_eligibility()
+    drafts = env['mda.hr.promotion.history'].search([
+        ('employee_id', 'in', employee_ids), ('state', '=', 'draft'),
+    ])
+    with recorder.step('eligibility:promotion_history', size, rows=len(drafts)):
+        drafts._recompute_promotion_eligibility()
+
+    projection = env['mda.hr.workforce.projection'].create({'name': 'Benchmark Projection'})
+    with recorder.step('workforce_projection', size):
+        projection.action_run()
+
+
+def run_benchmarks(env, sizes=BENCHMARK_SIZES, output=None, seed=BENCHMARK_SEED, trace_memory=True):
+    """
+    Benchmark the module on a synthetic roll of each size, rolling each run back.
+    tracemalloc slows Python-heavy steps down; pass trace_memory=False for timings only.
+    Returns dict: run metadata and the list of step results, also written to `output` as JSON.
+    """
+    module = env['ir.module.module'].search([('name', '=', 'mda_hr')], limit=1)
+    recorder = BenchmarkRecorder(env, trace_memory=trace_memory)
+    for size in sizes:
+        started = time.perf_counter()
+        env.flush_all()
+        env.cr.execute('SAVEPOINT mda_hr_benchmark')
+        try:
+            benchmark_roll(env, size, recorder, seed=seed)
+            env.flush_all()
+        finally:
+            env.cr.execute('ROLLBACK TO SAVEPOINT mda_hr_benchmark')
+            env.invalidate_all(flush=False)
+            env.registry.clear_cache()
+        _logger.info("Benchmark of %s employees done in %.1fs", size, time.perf_counter() - started)
+
+    run = {
+        'module_version': module.latest_version or module.installed_version,
+        'odoo_version': release.version,
+        'python_version': platform.python_version(),
+        'database': env.cr.dbname,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'sizes': list(sizes),
+        'trace_memory': trace_memory,
+        'results': recorder.results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(run, f, indent=2)
+    return run
+
+
+def compare_benchmarks(baseline, current, factor=REGRESSION_FACTOR):
+    """
+    Compare two benchmark files (or run dicts) step by step.
+    Returns list of (step, size, metric, baseline value, current value) that regressed by `factor`
+    """
+    def load(run):
+        if isinstance(run, str):
+            with open(run) as f:
+                run = json.load(f)
+        return {(result['step'], result['size']): result for result in run['results']}
+
+    baseline, current = load(baseline), load(current)
+    regressions = []
+    for key, result in sorted(current.items()):
+        before = baseline.get(key)
+        if not before:
+            continue
+        if before['seconds'] >= MIN_COMPARED_SECONDS and result['seconds'] > before['seconds'] * factor:
+            regressions.append(key + ('seconds', before['seconds'], result['seconds']))
+        if result['queries'] > before['queries'] * factor:
+            regressions.append(key + ('queries', before['queries'], result['queries']))
+        if before.get('peak_memory_kb') and result.get('peak_memory_kb') \
+                and result['peak_memory_kb'] > before['peak_memory_kb'] * factor:
+            regressions.append(key + ('peak_memory_kb', before['peak_memory_kb'], result['peak_memory_kb']))
+    return regressions
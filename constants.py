@@ -89,3 +89,119 @@ GEO_POLITICAL_ZONE_MAPPING = {
     'ekiti': 'south_west', 'lagos': 'south_west', 'ogun': 'south_west',
     'ondo': 'south_west', 'osun': 'south_west', 'oyo': 'south_west',
 }
+
+# Aliases seen on legacy nominal rolls, keyed by the normalised cell value
+# (lower case, non-alphanumerics collapsed to '_')
+STATE_ALIASES = {
+    'abuja': 'fct',
+    'f_c_t': 'fct',
+    'nassarawa': 'nasarawa',
+    'akwa': 'akwa_ibom',
+    'cross_rivers': 'cross_river',
+}
+
+APPOINTMENT_TYPE_ALIASES = {
+    'residency': 'contract',
+    'honourary': 'contract',
+    'honorary': 'contract',
+    'medical_officer': 'permanent',
+    'locum': 'temporary',
+    'visiting': 'temporary',
+}
+
+EMPLOYEE_STATUS_ALIASES = {
+    'regular': 'active',
+    'non_regular': 'active',
+}
+
+SALARY_STRUCTURE_ALIASES = {
+    'contopsal': 'others',
+}
+
+# Highest qualification levels, highest first; the labels are the buckets of the qualification report
+QUALIFICATION_LEVELS = [
+    ('doctorate', 'PhD'),
+    ('fellowship', 'Professional Fellowship'),
+    ('masters', 'M.Sc/M.A'),
+    ('postgraduate_diploma', 'Postgraduate Diploma'),
+    ('degree', 'B.Sc/B.A'),
+    ('hnd', 'HND'),
+    ('diploma', 'ND/Diploma'),
+    ('secondary', 'SSCE'),
+    ('primary', 'Primary'),
+    ('other', 'Other'),
+]
+
+# Qualification levels (masters and above) retiring at 65 instead of 60
+EXTENDED_SERVICE_LEVELS = ('doctorate', 'fellowship', 'masters')
+
+# Qualification words (upper case, without dots, spaced initials joined: 'B S C' -> 'BSC')
+QUALIFICATION_ALIASES = {
+    'PHD': 'doctorate', 'DPHIL': 'doctorate', 'DOCTORATE': 'doctorate',
+    'FELLOWSHIP': 'fellowship', 'FWACS': 'fellowship', 'FWACP': 'fellowship', 'FMCS': 'fellowship',
+    'FMCP': 'fellowship', 'FICS': 'fellowship', 'FMCOG': 'fellowship', 'FMCPAED': 'fellowship',
+    'FRCS': 'fellowship', 'FWACOG': 'fellowship',
+    'MSC': 'masters', 'MA': 'masters', 'MBA': 'masters', 'MPA': 'masters', 'MPPA': 'masters',
+    'MPH': 'masters', 'MHPM': 'masters', 'MHE': 'masters', 'MED': 'masters', 'MENG': 'masters',
+    'MTECH': 'masters', 'LLM': 'masters', 'MPHIL': 'masters', 'MASTER': 'masters', 'MASTERS': 'masters',
+    'PGD': 'postgraduate_diploma', 'PGDE': 'postgraduate_diploma',
+    'BSC': 'degree', 'BA': 'degree', 'BED': 'degree', 'BENG': 'degree', 'BTECH': 'degree',
+    'BNSC': 'degree', 'BDS': 'degree', 'MBBS': 'degree', 'BMLS': 'degree', 'BPHARM': 'degree',
+    'BPHARMACY': 'degree', 'LLB': 'degree', 'BL': 'degree', 'BAGRIC': 'degree', 'BSCED': 'degree',
+    'PHARMD': 'degree', 'DVM': 'degree', 'DEGREE': 'degree', 'BACHELOR': 'degree',
+    'BAED': 'degree', 'BAENG': 'degree', 'BE': 'degree', 'MB': 'degree', 'MBSS': 'degree', 'MD': 'degree',
+    'MBCHB': 'degree', 'BCHD': 'degree', 'BPT': 'degree', 'BPHAR': 'degree',
+    'HND': 'hnd',
+    'ND': 'diploma', 'OND': 'diploma', 'NCE': 'diploma', 'DIPLOMA': 'diploma', 'RN': 'diploma',
+    'RM': 'diploma', 'NN': 'diploma', 'NURSING': 'diploma', 'MLT': 'diploma', 'TECHNICIAN': 'diploma',
+    'DIP': 'diploma', 'NURSE': 'diploma', 'PN': 'diploma', 'RRN': 'diploma',
+    'SSCE': 'secondary', 'SECONDARY': 'secondary', 'SECONDRY': 'secondary', 'WAEC': 'secondary', 'NECO': 'secondary', 'GCE': 'secondary', 'SSC': 'secondary',
+    'SCE': 'secondary',
+    'FSLC': 'primary', 'PRIMARY': 'primary',
+}
+
+# Word prefixes for qualifications run together with their subject ('MSCHEALTHCARE', 'PGDPPA')
+QUALIFICATION_PREFIXES = [
+    ('PHD', 'doctorate'),
+    ('FWAC', 'fellowship'),
+    ('FMC', 'fellowship'),
+    ('MSC', 'masters'),
+    ('PGD', 'postgraduate_diploma'),
+    ('BSC', 'degree'),
+    ('BPHARM', 'degree'),
+    ('BPHYSIO', 'degree'),
+    ('BDS', 'degree'),
+    ('HND', 'hnd'),
+    ('TECHNICIAN', 'diploma'),
+]
+
+# PFA name words -> seeded PFA partner (data/pfa_partners.xml), first match wins
+PFA_KEYWORDS = [
+    (('stanbic',), 'pfa_stanbic'),
+    (('sigma',), 'pfa_sigma'),
+    (('trustfund',), 'pfa_trust_fund'),
+    (('trust', 'fund'), 'pfa_trust_fund'),
+    (('premium',), 'pfa_premium'),
+    (('legacy',), 'pfa_fcmb'),
+    (('fcmb',), 'pfa_fcmb'),
+    (('arm',), 'pfa_arm'),
+    (('alliance',), 'pfa_alliance'),
+    (('aiico',), 'pfa_aiico'),
+    (('fidelity',), 'pfa_fidelity'),
+    (('apt',), 'pfa_apt'),
+    (('first', 'guarantee'), 'pfa_first_guarantee'),
+    (('pal',), 'pfa_pal'),
+    (('anchor',), 'pfa_anchor'),
+    (('leadway',), 'pfa_leadway'),
+    (('lead', 'way'), 'pfa_leadway'),
+    (('crusader',), 'pfa_crusader'),
+    (('axa',), 'pfa_axa_mansard'),
+    (('mansard',), 'pfa_axa_mansard'),
+    (('future', 'unity'), 'pfa_future_unity'),
+    (('veritas',), 'pfa_veritas'),
+    (('investment', 'one'), 'pfa_investment_one'),
+    (('gtb',), 'pfa_guaranty_trust'),
+    (('guaranty',), 'pfa_guaranty_trust'),
+    (('nlpc',), 'pfa_nlpc'),
+    (('nupemco',), 'pfa_nupemco'),
+]
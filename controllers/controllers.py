@@ -1,22 +1,75 @@
 # -*- coding: utf-8 -*-
-# from odoo import http
+import json
 
+from odoo import api, http
+from odoo.exceptions import AccessError, UserError
+from odoo.http import request, content_disposition
 
-# class MdaHr(http.Controller):
-#     @http.route('/mda_hr/mda_hr', auth='public')
-#     def index(self, **kw):
-#         return "Hello, world"
+from ..models.report_export import EXPORT_MIMETYPES, EXPORT_REPORTS
+from ..models.roll_api import API_RESOURCES
 
-#     @http.route('/mda_hr/mda_hr/objects', auth='public')
-#     def list(self, **kw):
-#         return http.request.render('mda_hr.listing', {
-#             'root': '/mda_hr/mda_hr',
-#             'objects': http.request.env['mda_hr.mda_hr'].search([]),
-#         })
+EXPORT_FILTERS = ('date_from', 'date_to', 'state_filter', 'employee_status', 'as_of_date')
 
-#     @http.route('/mda_hr/mda_hr/objects/<model("mda_hr.mda_hr"):obj>', auth='public')
-#     def object(self, obj, **kw):
-#         return http.request.render('mda_hr.object', {
-#             'object': obj
-#         })
 
+class MdaHr(http.Controller):
+
+    @http.route('/mda_hr/report/export/<string:report>', type='http', auth='user')
+    def export_report(self, report, export_format='csv', domain=None, **filters):
+        """Send a report as CSV (streamed while rows are read in batches) or XLSX (sent once built)."""
+        if report not in EXPORT_REPORTS or export_format not in EXPORT_MIMETYPES:
+            raise request.not_found()
+        data = {key: filters[key] for key in EXPORT_FILTERS if filters.get(key)}
+        if domain:
+            data['domain'] = json.loads(domain)
+
+        Export = request.env['mda.hr.report.export']
+        # Fail before the response starts if the user cannot read the report
+        Export._get_export_query(report, data)
+        filename = Export._get_export_filename(report, export_format)
+
+        # The request cursor is closed once this method returns, the generator reads with its own
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+
+        def generate():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                export = env['mda.hr.report.export']
+                stream = export._iter_csv if export_format == 'csv' else export._iter_xlsx
+                yield from stream(report, data)
+
+        return request.make_response(generate(), headers=[
+            ('Content-Type', EXPORT_MIMETYPES[export_format]),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+
+    @http.route('/mda_hr/api/<string:resource>', type='http', auth='user', methods=['GET'], readonly=True)
+    def roll_api(self, resource, **params):
+        """
+        JSON page of employees or promotions, e.g. /mda_hr/api/employees?fields=file_number,name
+        &limit=1000&cursor=...; follow next_cursor until it is null. Pass changed_since to only
+        get the records written since then. Answers 304 when If-None-Match matches the page.
+        """
+        if resource not in API_RESOURCES:
+            raise request.not_found()
+        Api = request.env['mda.hr.roll.api']
+        try:
+            page = Api.get_page(resource, params)
+        except AccessError as e:
+            return request.make_json_response({'error': str(e)}, status=403)
+        except (UserError, ValueError) as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+
+        body, etag = Api._dump_page(page)
+        headers = [('ETag', '"%s"' % etag), ('Cache-Control', 'private, no-cache')]
+        if request.httprequest.if_none_match.contains(etag):
+            return request.make_response('', headers=headers, status=304)
+        return request.make_response(body, headers=headers + [('Content-Type', 'application/json')])
+
+    @http.route('/mda_hr/api/kpis', type='http', auth='user', methods=['GET'], readonly=True)
+    def workforce_kpis(self):
+        """Workforce dashboard figures of the user's companies, read from the KPI counters."""
+        try:
+            data = request.env['mda.hr.workforce.kpi'].get_dashboard_data()
+        except AccessError as e:
+            return request.make_json_response({'error': str(e)}, status=403)
+        return request.make_json_response(data, headers=[('Cache-Control', 'private, no-cache')])
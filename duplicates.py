@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicate staff detection
+Blocks the roll on IPPIS, RSA PIN and date of birth + surname sound, then scores only the
+candidate pairs that share a block
+"""
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from .roll_parser import normalise_rsa_pin
+
+# Pairs scoring at least this are suspected duplicates
+DUPLICATE_THRESHOLD = 0.6
+
+# Blocks larger than this (placeholder identifiers, default birthdays) are not compared
+MAX_BLOCK_SIZE = 50
+
+IDENTIFIER_WEIGHT = 0.45
+BIRTHDAY_WEIGHT = 0.2
+BIRTHDAY_MISMATCH_PENALTY = 0.2
+NAME_WEIGHT = 0.45
+# Words sounding alike count for a little less than the same spelling
+PHONETIC_NAME_FACTOR = 0.9
+# Less similar words are different names
+MIN_WORD_SIMILARITY = 0.8
+
+_SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in (('1', 'BFPV'), ('2', 'CGJKQSXZ'), ('3', 'DT'), ('4', 'L'), ('5', 'MN'), ('6', 'R'))
+    for letter in letters
+}
+_NAME_TOKEN = re.compile(r'[A-Z]+')
+
+
+@lru_cache(maxsize=4096)
+def soundex(word):
+    """American Soundex code of a name ('ABDURRAHMAN' and 'ABDULRAHMAN' -> 'A136'/'A134')."""
+    letters = re.sub(r'[^A-Z]', '', (word or '').upper())
+    if not letters:
+        return ''
+    code, last = letters[0], _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+        if letter not in 'HW':
+            last = digit
+    return (code + '000')[:4]
+
+
+def name_tokens(*names):
+    """Upper-case name words, in a stable order so swapped first/middle names compare equal."""
+    return tuple(sorted(token for name in names if name for token in _NAME_TOKEN.findall(name.upper())))
+
+
+def make_person(employee_id, ippis, rsa_pin, birthday, surname, first_name, middle_name, name):
+    """Comparable record of one employee (or roll row)."""
+    tokens = name_tokens(surname, first_name, middle_name) or name_tokens(name)
+    surname_tokens = name_tokens(surname)
+    return {
+        'id': employee_id,
+        'ippis': (ippis or '').strip().upper() or None,
+        'rsa_pin': normalise_rsa_pin(rsa_pin) or None,
+        'birthday': birthday or None,
+        'surname_key': soundex(surname_tokens[0] if surname_tokens else (tokens[0] if tokens else '')),
+        'tokens': tokens,
+    }
+
+
+def blocking_keys(person):
+    keys = []
+    if person['ippis']:
+        keys.append(('ippis', person['ippis']))
+    if person['rsa_pin']:
+        keys.append(('rsa_pin', person['rsa_pin']))
+    if person['birthday'] and person['surname_key']:
+        keys.append(('birth', person['birthday'], person['surname_key']))
+    return keys
+
+
+@lru_cache(maxsize=65536)
+def word_similarity(left, right):
+    """1 for the same word, 0.9+ for spelling variants sounding alike, 0 for different names."""
+    if left == right:
+        return 1.0
+    matcher = SequenceMatcher(None, left, right)
+    ratio = matcher.ratio() if matcher.real_quick_ratio() >= MIN_WORD_SIMILARITY else 0.0
+    if soundex(left) == soundex(right):
+        ratio = max(ratio, PHONETIC_NAME_FACTOR)
+    return ratio if ratio >= MIN_WORD_SIMILARITY else 0.0
+
+
+def name_similarity(left, right):
+    """Best one-to-one word matches over the word count of the longer name, in any word order."""
+    if not left or not right:
+        return 0.0
+    remaining = list(right)
+    total = 0.0
+    for word in left:
+        best, best_index = 0.0, None
+        for index, other in enumerate(remaining):
+            similarity = word_similarity(word, other)
+            if similarity > best:
+                best, best_index = similarity, index
+        if best_index is not None:
+            total += best
+            del remaining[best_index]
+    return total / max(len(left), len(right))
+
+
+def score_pair(left, right):
+    """
+    Score how likely two people are the same.
+    Returns tuple: (score between 0 and 1, shared identifier, reasons)
+    """
+    score = 0.0
+    reasons = []
+    shared_identifier = False
+    for fname, label in (('ippis', 'Same IPPIS'), ('rsa_pin', 'Same RSA PIN')):
+        if left[fname] and left[fname] == right[fname]:
+            score += IDENTIFIER_WEIGHT
+            shared_identifier = True
+            reasons.append(label)
+
+    if left['birthday'] and right['birthday']:
+        if left['birthday'] == right['birthday']:
+            score += BIRTHDAY_WEIGHT
+            reasons.append('Same date of birth')
+        else:
+            score -= BIRTHDAY_MISMATCH_PENALTY
+            reasons.append('Different date of birth')
+
+    similarity = name_similarity(left['tokens'], right['tokens'])
+    if similarity == 1.0:
+        reasons.append('Same names')
+    elif similarity:
+        reasons.append('Similar names (%d%%)' % round(similarity * 100))
+    score += similarity * NAME_WEIGHT
+    return max(0.0, min(score, 1.0)), shared_identifier, reasons
+
+
+class DuplicateIndex:
+    """Blocking index of people; candidates are only the people sharing a block."""
+
+    def __init__(self, max_block_size=MAX_BLOCK_SIZE):
+        self.max_block_size = max_block_size
+        self.blocks = defaultdict(list)
+
+    def add(self, person):
+        for key in blocking_keys(person):
+            self.blocks[key].append(person)
+
+    def candidates(self, person):
+        seen = {person['id']}
+        for key in blocking_keys(person):
+            block = self.blocks.get(key, ())
+            if len(block) >= self.max_block_size:
+                continue
+            for other in block:
+                if other['id'] not in seen:
+                    seen.add(other['id'])
+                    yield other
+
+    def match(self, person, threshold=DUPLICATE_THRESHOLD):
+        """
+        Suspected duplicates of person among the indexed people: pairs scoring over the
+        threshold, and every pair sharing an IPPIS or RSA PIN (identifier reuse is reviewed too).
+        Returns list of (other id, score, reasons)
+        """
+        matches = []
+        for other in self.candidates(person):
+            score, shared_identifier, reasons = score_pair(person, other)
+            if score >= threshold or shared_identifier:
+                matches.append((other['id'], score, reasons))
+        return matches
+
+
+def find_duplicates(people, threshold=DUPLICATE_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Suspected duplicate pairs of a whole roll, comparing each person only with the ones before
+    it in the same blocks. Returns list of (lower id, higher id, score, reasons)
+    """
+    index = DuplicateIndex(max_block_size)
+    pairs = []
+    for person in people:
+        for other_id, score, reasons in index.match(person, threshold):
+            pairs.append((min(person['id'], other_id), max(person['id'], other_id), score, reasons))
+        index.add(person)
+    return pairs
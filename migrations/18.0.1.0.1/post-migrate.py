@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.addons.mda_hr.constants import EXTENDED_SERVICE_LEVELS
+from odoo.addons.mda_hr.roll_parser import normalise_qualification_level
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    # RSA PINs are stored normalised so lookups are exact index matches; the write date moves so
+    # roll API deltas pick them up
+    cr.execute("""
+        UPDATE hr_employee
+           SET rsa_pin = NULLIF(upper(regexp_replace(rsa_pin, '[[:space:]-]+', '', 'g')), ''),
+               write_date = now() at time zone 'UTC'
+         WHERE rsa_pin ~ '[[:space:]a-z-]'
+    """)
+    _logger.info("RSA PINs normalised for %s employees", cr.rowcount)
+
+    # The prefix index (varchar_pattern_ops) also serves equality lookups
+    cr.execute("DROP INDEX IF EXISTS hr_employee__rsa_pin_index")
+
+    # Masters and above retire at 65: dates computed before qualifications were canonicalised
+    # only recognised the literal 'phd' and 'master'
+    cr.execute("""
+        SELECT id, qualification
+          FROM hr_employee
+         WHERE qualification IS NOT NULL
+           AND retirement_date = (birthday + INTERVAL '60 years')::date
+    """)
+    stale_ids = [
+        employee_id for employee_id, qualification in cr.fetchall()
+        if normalise_qualification_level(qualification) in EXTENDED_SERVICE_LEVELS
+    ]
+    if stale_ids:
+        cr.execute("UPDATE hr_employee SET write_date = now() at time zone 'UTC' WHERE id = ANY(%s)", [stale_ids])
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        employees = env['hr.employee'].browse(stale_ids)
+        env.add_to_compute(employees._fields['retirement_date'], employees)
+        employees.modified(['retirement_date'])
+        env.flush_all()
+        _logger.info("Retirement dates recomputed for %s employees", len(stale_ids))
@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
 
+from . import profile_log
+from . import workforce_kpi
+from . import grade_level
+from . import establishment
+from . import hr_department
 from . import hr_employee
+from . import report_export
+from . import roll_api
 from . import hr_reports
+from . import employee_snapshot
+from . import ir_actions_report
+from . import report_job
 from . import promotion_history
 from . import promotion_schedule
 from . import promotion_report
-
+from . import employee_import
+from . import staff_duplicate
+from . import workforce_projection
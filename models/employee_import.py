@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import logging
+import time
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from odoo.tools import escape_psql
+from psycopg2 import DataError, IntegrityError
+from ..roll_parser import (
+    iter_roll_rows, chunked, build_name, parse_date, normalise_grade, normalise_state,
+    normalise_selection, normalise_appointment_type, normalise_employee_status,
+    normalise_salary_structure, normalise_identifier, normalise_rsa_pin, content_hash, ROLL_FIELDS,
+)
+
+_logger = logging.getLogger(__name__)
+
+BULK_IMPORT_CHUNK_SIZE = 1000
+
+# Rejections of a single roll row. Concurrency and operational errors (serialization failures,
+# deadlocks) are not caught: they abort the whole import so the transaction is not reused.
+ROLL_ROW_REJECTIONS = (UserError, ValidationError, ValueError, IntegrityError, DataError)
+
+# Chatter tracking and creation messages are pure overhead on a roll load
+BULK_IMPORT_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+}
+
+ROLL_TEXT_FIELDS = [
+    'surname', 'first_name', 'middle_name', 'name', 'rank', 'pfa_name', 'work_email',
+    'lga', 'remark', 'qualification', 'nature_of_desc', 'job_description',
+]
+ROLL_DATE_FIELDS = ['birthday', 'date_first_appointment', 'date_present_appointment']
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    @api.model
+    def bulk_import_roll(self, content, filename, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+        """
+        Import a CSV/XLSX nominal roll in chunks.
+        Returns a dict with row counts, rows/sec and the list of (row, reason) rejects.
+        """
+        return self._bulk_import_rows(iter_roll_rows(content, filename), chunk_size)
+
+    @api.model
+    def _bulk_import_rows(self, rows, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+        """Validate, normalise and insert raw roll rows one chunk at a time."""
+        started = time.monotonic()
+        employees = self.with_context(**BULK_IMPORT_CONTEXT)
+        cache = {'departments': {}, 'keys': set()}
+        stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'rejects': [], 'suspected': 0}
+        duplicate_index = self.env['mda.hr.staff.duplicate']._load_duplicate_index()
+
+        for chunk in chunked(rows, chunk_size):
+            # Row 1 is the header line
+            numbered = list(enumerate(chunk, start=stats['rows'] + 2))
+            stats['rows'] += len(chunk)
+
+            prepared, rejects = employees._prepare_roll_chunk(numbered, cache)
+            created, insert_rejects = employees._insert_roll_chunk(prepared)
+            rejects.extend(insert_rejects)
+
+            stats['imported'] += len(created)
+            stats['suspected'] += self.env['mda.hr.staff.duplicate']._check_new_employees(created, duplicate_index)
+            stats['rejected'] += len(rejects)
+            stats['rejects'].extend(rejects)
+
+            # Keep memory flat: the next chunk starts from an empty cache
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+        stats['duration'] = time.monotonic() - started
+        stats['rows_per_second'] = stats['rows'] / stats['duration'] if stats['duration'] else 0.0
+        _logger.info(
+            "Nominal roll import: %s rows, %s imported, %s rejected, %s suspected duplicates in %.1fs (%.0f rows/s)",
+            stats['rows'], stats['imported'], stats['rejected'], stats['suspected'],
+            stats['duration'], stats['rows_per_second'],
+        )
+        return stats
+
+    @api.model
+    def _normalise_roll_chunk(self, numbered_rows, cache):
+        """Turn raw rows into hashed create/write vals; returns (normalised, rejects)."""
+        selections = {
+            fname: self._fields[fname].selection
+            for fname in ('gender', 'appointment_type', 'employee_status', 'salary_structure')
+        }
+        department_ids = self._resolve_roll_departments(
+            {str(row['department']).strip() for _number, row in numbered_rows if row.get('department')},
+            cache['departments'],
+        )
+
+        normalised, rejects = [], []
+        for row_number, row in numbered_rows:
+            try:
+                vals = self._roll_row_to_vals(row, selections, department_ids)
+            except ValueError as e:
+                rejects.append((row_number, str(e)))
+                continue
+            vals['roll_hash'] = content_hash(vals)
+            normalised.append((row_number, vals))
+        return normalised, rejects
+
+    @api.model
+    def _prepare_roll_chunk(self, numbered_rows, cache):
+        """Normalise a chunk for creation; returns (prepared, rejects)."""
+        normalised, rejects = self._normalise_roll_chunk(numbered_rows, cache)
+        existing = self._existing_roll_keys(numbered_rows)
+
+        prepared = []
+        for row_number, vals in normalised:
+            keys = self._roll_keys(vals)
+            if keys & existing:
+                rejects.append((row_number, _("Employee already exists on the roll (use delta sync to update).")))
+                continue
+            if keys & cache['keys']:
+                rejects.append((row_number, _("Duplicate File Number/IPPIS within the file.")))
+                continue
+            cache['keys'] |= keys
+            prepared.append((row_number, vals))
+        return prepared, rejects
+
+    @api.model
+    def _roll_keys(self, vals):
+        return {(fname, vals[fname]) for fname in ('ippis', 'file_number') if vals.get(fname)}
+
+    @api.model
+    def _roll_row_to_vals(self, row, selections, department_ids):
+        """Normalise one raw row; raises ValueError with a readable reason."""
+        vals = {fname: str(row[fname]).strip() for fname in ROLL_TEXT_FIELDS if row.get(fname)}
+
+        vals['file_number'] = normalise_identifier(row.get('file_number'))
+        vals['ippis'] = normalise_identifier(row.get('ippis'))
+        if not vals['file_number'] and not vals['ippis']:
+            raise ValueError(_("File Number or IPPIS is required."))
+        if row.get('rsa_pin'):
+            vals['rsa_pin'] = normalise_rsa_pin(row['rsa_pin'])
+
+        for fname in ROLL_DATE_FIELDS:
+            try:
+                vals[fname] = parse_date(row.get(fname))
+            except ValueError:
+                raise ValueError(_("Invalid date '%(value)s' for %(field)s.",
+                                   value=row[fname], field=self._fields[fname].string))
+        if vals['date_first_appointment'] and vals['date_present_appointment'] \
+                and vals['date_present_appointment'] < vals['date_first_appointment']:
+            raise ValueError(_("Date of Present Appointment cannot be before Date of First Appointment."))
+
+        normalisers = {
+            'salary_grade_level': normalise_grade,
+            'state_of_origin': normalise_state,
+            'gender': lambda value: normalise_selection(value, selections['gender']),
+            'appointment_type': lambda value: normalise_appointment_type(value, selections['appointment_type']),
+            'employee_status': lambda value: normalise_employee_status(value, selections['employee_status']),
+            'salary_structure': lambda value: normalise_salary_structure(value, selections['salary_structure']),
+        }
+        for fname, normalise in normalisers.items():
+            if not row.get(fname):
+                continue
+            value = normalise(row[fname])
+            if not value:
+                raise ValueError(_("Unknown %(field)s '%(value)s'.",
+                                   field=self._fields[fname].string, value=row[fname]))
+            vals[fname] = value
+
+        if row.get('department'):
+            vals['department_id'] = department_ids[str(row['department']).strip().lower()]
+        elif row.get('department_xmlid'):
+            department = self.env.ref(row['department_xmlid'], raise_if_not_found=False)
+            if department:
+                vals['department_id'] = department.id
+
+        if not vals.get('name'):
+            vals['name'] = build_name(vals.get('surname'), vals.get('first_name'), vals.get('middle_name'))
+        if not vals['name']:
+            raise ValueError(_("Employee name (or Surname/First Name) is required."))
+        return {fname: value for fname, value in vals.items() if value is not False}
+
+    @api.model
+    def _resolve_roll_departments(self, names, department_cache):
+        """Map department names to ids (of the company or shared), creating the missing ones in one batch."""
+        missing = {name for name in names if name.lower() not in department_cache}
+        if missing:
+            # Names are matched literally: '%' and '_' in a roll cell are not wildcards
+            domain = expression.AND([
+                expression.OR([[('name', '=ilike', escape_psql(name))] for name in missing]),
+                [('company_id', 'in', [self.env.company.id, False])],
+            ])
+            # The company's own departments come first (NULLs sort last)
+            for department in self.env['hr.department'].search(domain, order='company_id'):
+                department_cache.setdefault(department.name.lower(), department.id)
+            to_create = {}
+            for name in missing:
+                if name.lower() not in department_cache:
+                    to_create.setdefault(name.lower(), name)
+            if to_create:
+                departments = self.env['hr.department'].create([{'name': name} for name in to_create.values()])
+                for department in departments:
+                    department_cache[department.name.lower()] = department.id
+        return department_cache
+
+    @api.model
+    def _existing_roll_keys(self, numbered_rows):
+        """Return the (field, value) identifiers of the chunk already on the company roll."""
+        ippis = [normalise_identifier(row.get('ippis')) for _number, row in numbered_rows]
+        file_numbers = [normalise_identifier(row.get('file_number')) for _number, row in numbered_rows]
+        self.flush_model(['ippis', 'file_number', 'company_id'])
+        self.env.cr.execute("""
+            SELECT ippis, file_number
+              FROM hr_employee
+             WHERE (ippis = ANY(%s) OR file_number = ANY(%s))
+               AND company_id = %s
+        """, [[value for value in ippis if value], [value for value in file_numbers if value],
+              self.env.company.id])
+        existing = set()
+        for row_ippis, row_file_number in self.env.cr.fetchall():
+            existing.add(('ippis', row_ippis))
+            existing.add(('file_number', row_file_number))
+        return existing
+
+    @api.model
+    def _insert_roll_chunk(self, prepared):
+        """
+        Create a chunk in one call; fall back to row by row to isolate failures.
+        Returns tuple: (created employees, rejects [(row, reason)])
+        """
+        if not prepared:
+            return self.browse(), []
+        try:
+            with self.env.cr.savepoint():
+                return self.create([vals for _number, vals in prepared]), []
+        except ROLL_ROW_REJECTIONS:
+            _logger.info("Nominal roll chunk failed, retrying %s rows one by one", len(prepared))
+
+        created, rejects = self.browse(), []
+        for row_number, vals in prepared:
+            try:
+                with self.env.cr.savepoint():
+                    created |= self.create([vals])
+            except ROLL_ROW_REJECTIONS as e:
+                rejects.append((row_number, str(e)))
+        return created, rejects
+
+
+    @api.model
+    def sync_roll(self, content, filename, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+        """
+        Delta-sync the roll against an IPPIS extract, matching on IPPIS then File Number.
+        Only rows whose content hash differs are diffed, and only changed fields are written.
+        Returns added/changed/unchanged/missing counts plus rejects and the missing ids.
+        """
+        return self._sync_roll_rows(iter_roll_rows(content, filename), chunk_size)
+
+    @api.model
+    def _sync_roll_rows(self, rows, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+        started = time.monotonic()
+        employees = self.with_context(**BULK_IMPORT_CONTEXT)
+        cache = {'departments': {}, 'keys': set()}
+        index, active_ids = self._roll_sync_index()
+        duplicate_index = self.env['mda.hr.staff.duplicate']._load_duplicate_index()
+        seen_ids = set()
+        stats = {
+            'rows': 0, 'added': 0, 'changed': 0, 'unchanged': 0, 'rejected': 0,
+            'rejects': [], 'missing_ids': [], 'suspected': 0,
+        }
+
+        for chunk in chunked(rows, chunk_size):
+            numbered = list(enumerate(chunk, start=stats['rows'] + 2))
+            stats['rows'] += len(chunk)
+            normalised, rejects = employees._normalise_roll_chunk(numbered, cache)
+
+            new_rows, candidates = [], {}
+            for row_number, vals in normalised:
+                keys = self._roll_keys(vals)
+                match = index.get(('ippis', vals.get('ippis'))) or index.get(('file_number', vals.get('file_number')))
+                if not match:
+                    if keys & cache['keys']:
+                        rejects.append((row_number, _("Duplicate File Number/IPPIS within the file.")))
+                        continue
+                    cache['keys'] |= keys
+                    new_rows.append((row_number, vals))
+                    continue
+                employee_id, stored_hash = match
+                if employee_id in seen_ids:
+                    rejects.append((row_number, _("Employee matched by more than one row in the file.")))
+                    continue
+                seen_ids.add(employee_id)
+                if stored_hash != vals['roll_hash']:
+                    candidates[employee_id] = vals
+                else:
+                    stats['unchanged'] += 1
+
+            changed = employees._apply_roll_changes(candidates)
+            stats['changed'] += changed
+            stats['unchanged'] += len(candidates) - changed
+
+            created, insert_rejects = employees._insert_roll_chunk(new_rows)
+            rejects.extend(insert_rejects)
+            stats['added'] += len(created)
+            stats['suspected'] += self.env['mda.hr.staff.duplicate']._check_new_employees(created, duplicate_index)
+            stats['rejected'] += len(rejects)
+            stats['rejects'].extend(rejects)
+
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+        stats['missing_ids'] = sorted(active_ids - seen_ids)
+        stats['duration'] = time.monotonic() - started
+        stats['rows_per_second'] = stats['rows'] / stats['duration'] if stats['duration'] else 0.0
+        _logger.info(
+            "Nominal roll sync: %s rows, %s added, %s changed, %s unchanged, %s missing, %s rejected in %.1fs",
+            stats['rows'], stats['added'], stats['changed'], stats['unchanged'],
+            len(stats['missing_ids']), stats['rejected'], stats['duration'],
+        )
+        return stats
+
+    @api.model
+    def _roll_sync_index(self):
+        """
+        One narrow scan of the company roll.
+        Returns ({(field, value): (id, roll_hash)}, ids of active employees).
+        """
+        self.flush_model(['ippis', 'file_number', 'roll_hash', 'active', 'company_id'])
+        self.env.cr.execute("""
+            SELECT id, ippis, file_number, roll_hash, active
+              FROM hr_employee
+             WHERE company_id = %s
+        """, [self.env.company.id])
+        index, active_ids = {}, set()
+        for employee_id, ippis, file_number, roll_hash, active in self.env.cr.fetchall():
+            if ippis:
+                index.setdefault(('ippis', ippis), (employee_id, roll_hash))
+            if file_number:
+                index.setdefault(('file_number', file_number), (employee_id, roll_hash))
+            if active:
+                active_ids.add(employee_id)
+        return index, active_ids
+
+    @api.model
+    def _apply_roll_changes(self, candidates):
+        """
+        Diff candidate rows against the stored values and write only what changed.
+        Employees sharing identical changes are written together. Returns the number changed.
+        """
+        if not candidates:
+            return 0
+        employees = self.browse(list(candidates)).with_context(mda_hr_roll_sync=True)
+        employees.fetch([fname for fname in ROLL_FIELDS if fname in self._fields])
+
+        groups = {}
+        for employee in employees:
+            vals = candidates[employee.id]
+            diff = {}
+            for fname, value in vals.items():
+                if fname == 'roll_hash':
+                    continue
+                current = employee[fname]
+                if self._fields[fname].type == 'many2one':
+                    current = current.id
+                if (current or False) != (value or False):
+                    diff[fname] = value
+            if diff:
+                groups.setdefault(tuple(sorted(diff.items())), []).append(employee.id)
+
+        for diff, employee_ids in groups.items():
+            employees.browse(employee_ids).write(dict(diff))
+
+        # Hashes differ per employee, so they are stored in one statement after the writes
+        self.env.cr.execute("""
+            UPDATE hr_employee AS emp
+               SET roll_hash = new.roll_hash
+              FROM unnest(%s::int[], %s::varchar[]) AS new(id, roll_hash)
+             WHERE emp.id = new.id
+        """, [list(candidates), [vals['roll_hash'] for vals in candidates.values()]])
+        self.invalidate_model(['roll_hash'])
+        return sum(len(employee_ids) for employee_ids in groups.values())
+
+
+class HrEmployeeImport(models.TransientModel):
+    """Wizard for bulk importing or delta-syncing a nominal roll"""
+    _name = 'mda.hr.employee.import'
+    _description = 'Nominal Roll Bulk Import'
+
+    mode = fields.Selection([
+        ('import', 'Bulk Import (new staff only)'),
+        ('sync', 'Delta Sync (IPPIS extract)'),
+    ], string='Mode', required=True, default='import')
+    data_file = fields.Binary(string='Roll File', required=True)
+    filename = fields.Char(string='File Name')
+    chunk_size = fields.Integer(string='Rows per Chunk', default=BULK_IMPORT_CHUNK_SIZE)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+
+    rows_total = fields.Integer(string='Rows Read', readonly=True)
+    rows_imported = fields.Integer(string='Rows Added', readonly=True)
+    rows_changed = fields.Integer(string='Rows Changed', readonly=True)
+    rows_unchanged = fields.Integer(string='Rows Unchanged', readonly=True)
+    rows_missing = fields.Integer(string='Missing from File', readonly=True)
+    rows_rejected = fields.Integer(string='Rows Rejected', readonly=True)
+    rows_suspected = fields.Integer(string='Suspected Duplicates', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True)
+    rows_per_second = fields.Float(string='Rows per Second', readonly=True)
+    reject_log = fields.Text(string='Rejected Rows', readonly=True)
+    missing_employee_ids = fields.Many2many('hr.employee', string='Missing Employees', readonly=True)
+
+    def action_import(self):
+        """Run the bulk import or delta sync and show the summary"""
+        self.ensure_one()
+        if self.chunk_size <= 0:
+            raise UserError(_("Rows per Chunk must be a positive number."))
+        content = base64.b64decode(self.data_file)
+        employees = self.env['hr.employee']
+        try:
+            if self.mode == 'sync':
+                stats = employees.sync_roll(content, self.filename, self.chunk_size)
+            else:
+                stats = employees.bulk_import_roll(content, self.filename, self.chunk_size)
+        except ValueError as e:
+            raise UserError(str(e))
+
+        self.write(self._get_result_vals(stats))
+        return self._reopen()
+
+    def action_view_missing(self):
+        """Open the active employees that were not in the synced file"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Missing from Roll File'),
+            'res_model': 'hr.employee',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.missing_employee_ids.ids)],
+        }
+
+    def action_view_duplicates(self):
+        """Open the suspected duplicates waiting for review"""
+        action = self.env['ir.actions.act_window']._for_xml_id('mda_hr.action_mda_hr_staff_duplicate')
+        action['target'] = 'main'
+        return action
+
+    def _get_result_vals(self, stats):
+        return {
+            'state': 'done',
+            'rows_total': stats['rows'],
+            'rows_imported': stats.get('added', stats.get('imported', 0)),
+            'rows_changed': stats.get('changed', 0),
+            'rows_unchanged': stats.get('unchanged', 0),
+            'rows_missing': len(stats.get('missing_ids', [])),
+            'rows_rejected': stats['rejected'],
+            'rows_suspected': stats.get('suspected', 0),
+            'duration': stats['duration'],
+            'rows_per_second': stats['rows_per_second'],
+            'reject_log': '\n'.join(
+                _("Row %(row)s: %(reason)s", row=row, reason=reason) for row, reason in stats['rejects']
+            ),
+            'missing_employee_ids': [(6, 0, stats.get('missing_ids', []))],
+        }
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+import logging
+from ..constants import SALARY_GRADE_LEVELS
+from .hr_reports import EMPLOYEE_STATUS_FILTER
+
+_logger = logging.getLogger(__name__)
+
+# hr.employee fields kept over time; a change to any of them starts a new snapshot
+SNAPSHOT_FIELDS = ['salary_grade_level', 'rank', 'department_id', 'employee_status']
+
+# Statuses of staff no longer in service: without a status filter, "as of" reports leave them out
+SERVICE_EXIT_STATUSES = ('retired', 'deceased', 'terminated')
+
+
+class HrEmployeeSnapshot(models.Model):
+    """
+    Grade, rank, department and status of an employee over [date_from, date_to); the current
+    values are the row without an end date.
+    """
+    _name = 'mda.hr.employee.snapshot'
+    _description = 'Employee Snapshot'
+    _order = 'employee_id, date_from'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, readonly=True,
+                                  index=True, ondelete='cascade')
+    date_from = fields.Date(string='Valid From', required=True, readonly=True)
+    date_to = fields.Date(string='Valid Until', readonly=True, help='First day the values no longer held')
+
+    salary_grade_level = fields.Selection(SALARY_GRADE_LEVELS, string='Grade Level', readonly=True)
+    rank = fields.Char(string='Rank', readonly=True)
+    department_id = fields.Many2one('hr.department', string='Department', readonly=True)
+    employee_status = fields.Selection(EMPLOYEE_STATUS_FILTER, string='Employee Status', readonly=True)
+
+    def init(self):
+        super().init()
+        # "As of" queries are one scan of the validity ranges; changes look up the open row
+        create_index(self.env.cr, 'mda_hr_employee_snapshot_period_idx', self._table,
+                     ['daterange(date_from, date_to)'], method='gist')
+        create_index(self.env.cr, 'mda_hr_employee_snapshot_open_idx', self._table,
+                     ['employee_id'], where='date_to IS NULL')
+
+    @api.model
+    def _as_of_condition(self, alias, as_of):
+        """SQL condition of the rows of table alias valid on as_of (matches the period index)"""
+        return SQL('daterange(%s, %s) @> %s::date',
+                   SQL.identifier(alias, 'date_from'), SQL.identifier(alias, 'date_to'),
+                   fields.Date.to_date(as_of))
+
+    @api.model
+    def _search_as_of(self, as_of, employee_status=None):
+        """Query of the snapshots valid on as_of, with the given status then, or of the staff in service then"""
+        query = self._search([('employee_status', '=', employee_status)] if employee_status
+                             else [('employee_status', 'not in', SERVICE_EXIT_STATUSES)])
+        query.add_where(self._as_of_condition(query.table, as_of))
+        return query
+
+    @api.model
+    def _read_as_of(self, employee_ids, as_of):
+        """Returns dict: {employee id: {grade, rank, department id, status}} on as_of"""
+        self.flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT snap.employee_id, snap.salary_grade_level, snap.rank, snap.department_id, snap.employee_status
+              FROM mda_hr_employee_snapshot snap
+             WHERE snap.employee_id = ANY(%s) AND %s
+        """, list(employee_ids), self._as_of_condition('snap', as_of)))
+        return {
+            employee_id: {
+                'salary_grade_level': grade,
+                'rank': rank,
+                'department_id': department_id,
+                'employee_status': status,
+            }
+            for employee_id, grade, rank, department_id, status in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _record_changes(self, employees, effective_date=None):
+        """
+        Close the open snapshot of the employees whose tracked values changed on effective_date
+        (today by default) and open one with the new values. Employees without snapshots start
+        at their first appointment. A change dated on the start of the open snapshot replaces its
+        values; one dated before splits the snapshot valid then (see _record_backdated_changes).
+        """
+        if not employees:
+            return
+        employees.flush_recordset(SNAPSHOT_FIELDS + ['date_first_appointment'])
+        self.flush_model()
+        effective_date = fields.Date.to_date(effective_date) or fields.Date.context_today(self)
+        self.env.cr.execute("""
+            SELECT emp.id, emp.salary_grade_level, emp.rank, emp.department_id, emp.employee_status,
+                   emp.date_first_appointment, snap.id, snap.date_from, snap.salary_grade_level,
+                   snap.rank, snap.department_id, snap.employee_status
+              FROM hr_employee emp
+         LEFT JOIN mda_hr_employee_snapshot snap ON snap.employee_id = emp.id AND snap.date_to IS NULL
+             WHERE emp.id = ANY(%s)
+        """, [employees.ids])
+
+        to_close, to_replace, to_open, backdated = [], [], [], {}
+        for row in self.env.cr.fetchall():
+            employee_id, values, first_appointment, snapshot_id, date_from, snapshot_values = (
+                row[0], row[1:5], row[5], row[6], row[7], row[8:12])
+            if snapshot_id is None:
+                to_open.append((employee_id, min(first_appointment or effective_date, effective_date), None) + values)
+            elif snapshot_values == values:
+                continue
+            elif date_from == effective_date:
+                to_replace.append((snapshot_id,) + values)
+            elif date_from > effective_date:
+                backdated[employee_id] = {
+                    index: value
+                    for index, (value, snapshot_value) in enumerate(zip(values, snapshot_values))
+                    if value != snapshot_value
+                }
+            else:
+                to_close.append(snapshot_id)
+                to_open.append((employee_id, effective_date, None) + values)
+
+        if to_close:
+            self.env.cr.execute(
+                "UPDATE mda_hr_employee_snapshot SET date_to = %s WHERE id = ANY(%s)",
+                [effective_date, to_close])
+        if to_replace:
+            self._update_values(to_replace)
+        if to_open:
+            self._insert_periods(to_open)
+        if backdated:
+            self._record_backdated_changes(backdated, effective_date)
+        self.invalidate_model()
+        self.env['hr.employee'].invalidate_model(['snapshot_ids'])
+
+    @api.model
+    def _record_backdated_changes(self, changes, effective_date):
+        """
+        Apply changes dated before the open snapshot: {employee id: {SNAPSHOT_FIELDS index: value}}.
+        The snapshot valid on effective_date ends there and a copy starts that day; the changed
+        values are then set on every snapshot from effective_date on, their other values are kept
+        (a later promotion keeps its grade). Snapshots before effective_date are left as they were.
+        """
+        cr = self.env.cr
+        cr.execute("""
+            WITH valid AS (
+                SELECT id, employee_id, date_to, salary_grade_level, rank, department_id, employee_status
+                  FROM mda_hr_employee_snapshot
+                 WHERE employee_id = ANY(%(employee_ids)s)
+                   AND date_from < %(date)s AND date_to > %(date)s
+                   FOR UPDATE
+            ),
+            split AS (
+                UPDATE mda_hr_employee_snapshot snap SET date_to = %(date)s FROM valid WHERE snap.id = valid.id
+            )
+            INSERT INTO mda_hr_employee_snapshot
+                   (employee_id, date_from, date_to, salary_grade_level, rank, department_id, employee_status)
+            SELECT employee_id, %(date)s, date_to, salary_grade_level, rank, department_id, employee_status
+              FROM valid
+        """, {'employee_ids': list(changes), 'date': effective_date})
+
+        cr.execute("""
+            SELECT id, employee_id, date_from, salary_grade_level, rank, department_id, employee_status
+              FROM mda_hr_employee_snapshot
+             WHERE employee_id = ANY(%s) AND date_from >= %s
+          ORDER BY employee_id, date_from
+        """, [list(changes), effective_date])
+        to_update, to_open, first_seen = [], [], set()
+        for row in cr.fetchall():
+            snapshot_id, employee_id, date_from, values = row[0], row[1], row[2], row[3:7]
+            changed = tuple(changes[employee_id].get(index, value) for index, value in enumerate(values))
+            if employee_id not in first_seen:
+                first_seen.add(employee_id)
+                if date_from > effective_date:
+                    # Dated before the first snapshot: the changed values start on effective_date
+                    to_open.append((employee_id, effective_date, date_from) + changed)
+            if changed != values:
+                to_update.append((snapshot_id,) + changed)
+        if to_update:
+            self._update_values(to_update)
+        if to_open:
+            self._insert_periods(to_open)
+
+    @api.model
+    def _update_values(self, rows):
+        """Set the tracked values of snapshots: rows of (id,) + SNAPSHOT_FIELDS values"""
+        self.env.cr.execute("""
+            UPDATE mda_hr_employee_snapshot AS snap
+               SET salary_grade_level = new.salary_grade_level, rank = new.rank,
+                   department_id = new.department_id, employee_status = new.employee_status
+              FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::int[], %s::varchar[])
+                   AS new(id, salary_grade_level, rank, department_id, employee_status)
+             WHERE snap.id = new.id
+        """, [list(column) for column in zip(*rows)])
+
+    @api.model
+    def _insert_periods(self, rows):
+        """Insert snapshots: rows of (employee id, date from, date to) + SNAPSHOT_FIELDS values"""
+        self.env.cr.execute("""
+            INSERT INTO mda_hr_employee_snapshot
+                   (employee_id, date_from, date_to, salary_grade_level, rank, department_id, employee_status)
+            SELECT * FROM unnest(%s::int[], %s::date[], %s::date[], %s::varchar[], %s::varchar[], %s::int[], %s::varchar[])
+        """, [list(column) for column in zip(*rows)])
+
+    @api.model
+    def _backfill(self):
+        """
+        Build the snapshots of the employees that have none from their implemented promotions:
+        one row per promotion, plus one from the first appointment to the first promotion (grade
+        and rank unknown then), all with the Active status. Staff with another status now get it
+        from their departure date (retirees: their retirement date at the latest; otherwise the
+        day the record was last written). Departments are the current ones.
+        Returns the number of employees backfilled.
+        """
+        self.env['hr.employee'].flush_model()
+        self.env['mda.hr.promotion.history'].flush_model()
+        self.env.cr.execute("""
+            WITH employees AS (
+                SELECT emp.id, COALESCE(emp.date_first_appointment, emp.create_date::date) AS date_start,
+                       emp.salary_grade_level, emp.rank, emp.department_id, emp.employee_status,
+                       CASE WHEN emp.employee_status <> 'active' THEN GREATEST(
+                           COALESCE(
+                               emp.departure_date,
+                               CASE WHEN emp.employee_status = 'retired'
+                                    THEN LEAST(emp.retirement_date, emp.write_date::date) END,
+                               emp.write_date::date),
+                           COALESCE(emp.date_first_appointment, emp.create_date::date))
+                       END AS status_since
+                  FROM hr_employee emp
+                 WHERE NOT EXISTS (SELECT 1 FROM mda_hr_employee_snapshot snap WHERE snap.employee_id = emp.id)
+            ),
+            promotions AS (
+                SELECT DISTINCT ON (rec.employee_id, rec.effective_date)
+                       rec.employee_id, rec.effective_date, rec.new_salary_grade_level, rec.new_rank
+                  FROM mda_hr_promotion_history rec
+                  JOIN employees ON employees.id = rec.employee_id
+                 WHERE rec.state = 'implemented'
+              ORDER BY rec.employee_id, rec.effective_date, rec.id DESC
+            ),
+            periods AS (
+                SELECT employee_id, effective_date AS date_from,
+                       LEAD(effective_date) OVER (PARTITION BY employee_id ORDER BY effective_date) AS date_to,
+                       new_salary_grade_level, new_rank
+                  FROM promotions
+            ),
+            first_promotions AS (
+                SELECT employee_id, MIN(effective_date) AS effective_date FROM promotions GROUP BY employee_id
+            ),
+            service AS (
+                -- Before the first promotion, or the whole service without promotions
+                SELECT employees.id AS employee_id, employees.date_start AS date_from,
+                       first_promotions.effective_date AS date_to,
+                       CASE WHEN first_promotions.employee_id IS NULL THEN employees.salary_grade_level END
+                           AS salary_grade_level,
+                       CASE WHEN first_promotions.employee_id IS NULL THEN employees.rank END AS rank
+                  FROM employees
+             LEFT JOIN first_promotions ON first_promotions.employee_id = employees.id
+                 WHERE first_promotions.effective_date IS NULL OR first_promotions.effective_date > employees.date_start
+                UNION ALL
+                -- One row per promotion; the last one holds the current grade and rank
+                SELECT periods.employee_id, periods.date_from, periods.date_to,
+                       CASE WHEN periods.date_to IS NULL THEN employees.salary_grade_level ELSE periods.new_salary_grade_level END,
+                       CASE WHEN periods.date_to IS NULL THEN employees.rank ELSE periods.new_rank END
+                  FROM periods
+                  JOIN employees ON employees.id = periods.employee_id
+            ),
+            inserted AS (
+                INSERT INTO mda_hr_employee_snapshot
+                       (employee_id, date_from, date_to, salary_grade_level, rank, department_id, employee_status)
+                -- Active service, ending when the current status started (LEAST ignores NULLs)
+                SELECT service.employee_id, service.date_from, LEAST(service.date_to, employees.status_since),
+                       service.salary_grade_level, service.rank, employees.department_id, 'active'
+                  FROM service
+                  JOIN employees ON employees.id = service.employee_id
+                 WHERE employees.status_since IS NULL OR service.date_from < employees.status_since
+                UNION ALL
+                -- The current status, from the day it started
+                SELECT employees.id, employees.status_since, NULL, employees.salary_grade_level,
+                       employees.rank, employees.department_id, employees.employee_status
+                  FROM employees
+                 WHERE employees.status_since IS NOT NULL
+             RETURNING employee_id
+            )
+            SELECT COUNT(DISTINCT employee_id) FROM inserted
+        """)
+        count = self.env.cr.fetchone()[0]
+        self.invalidate_model()
+        if count:
+            _logger.info("Employee snapshots backfilled for %s employees", count)
+        return count
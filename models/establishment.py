@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Employee fields deciding which approved post an employee fills
+ESTABLISHMENT_FIELDS = ['department_id', 'salary_grade_level', 'employee_status', 'active']
+
+# Next grade level of the same salary structure, for the grade level joined as "gl"
+NEXT_GRADE_SQL = """(
+    SELECT nxt.id
+      FROM mda_hr_grade_level nxt
+     WHERE nxt.salary_structure = gl.salary_structure AND nxt.level > gl.level
+  ORDER BY nxt.level, nxt.rank_order
+     LIMIT 1
+)"""
+
+# Vacant approved post on the next grade level in the department of the employee "emp"
+VACANCY_AVAILABLE_SQL = """EXISTS (
+    SELECT 1
+      FROM mda_hr_establishment est
+     WHERE est.department_id = emp.department_id
+       AND est.grade_level_id = %s
+       AND est.filled_count < est.approved_posts
+)""" % NEXT_GRADE_SQL
+
+
+class HrEstablishment(models.Model):
+    """Approved posts per department and grade level, with maintained filled/vacant counters"""
+    _name = 'mda.hr.establishment'
+    _description = 'Grade Establishment'
+    _order = 'department_id, grade_code'
+
+    department_id = fields.Many2one('hr.department', string='Department', required=True, index=True)
+    grade_level_id = fields.Many2one('mda.hr.grade.level', string='Grade Level', required=True, ondelete='restrict')
+    grade_code = fields.Char(related='grade_level_id.code', store=True, index=True)
+    salary_structure = fields.Char(related='grade_level_id.salary_structure')
+    approved_posts = fields.Integer(string='Approved Posts', required=True, default=0, aggregator='sum')
+
+    # Maintained by _update_filled_counts as employees join, leave or are promoted
+    filled_count = fields.Integer(string='Filled', readonly=True, copy=False, aggregator='sum')
+    vacant_count = fields.Integer(string='Vacant', compute='_compute_vacant_count', store=True, aggregator='sum')
+
+    _sql_constraints = [
+        ('department_grade_unique', 'unique(department_id, grade_level_id)',
+         'A department has one establishment line per grade level.'),
+        ('approved_posts_positive', 'CHECK(approved_posts >= 0)', 'Approved posts cannot be negative.'),
+        ('filled_count_positive', 'CHECK(filled_count >= 0)', 'Filled posts cannot be negative.'),
+    ]
+
+    @api.depends('department_id', 'grade_level_id')
+    def _compute_display_name(self):
+        for record in self:
+            record.display_name = '%s / %s' % (record.department_id.name or '', record.grade_level_id.name or '')
+
+    @api.depends('approved_posts', 'filled_count')
+    def _compute_vacant_count(self):
+        for record in self:
+            record.vacant_count = record.approved_posts - record.filled_count
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._recount_filled()
+        self._establishment_changed(records.department_id.ids)
+        return records
+
+    def write(self, vals):
+        departments = self.department_id
+        result = super().write(vals)
+        if 'department_id' in vals or 'grade_level_id' in vals:
+            self._recount_filled()
+        if {'department_id', 'grade_level_id', 'approved_posts'} & set(vals):
+            self._establishment_changed((departments | self.department_id).ids)
+        return result
+
+    def unlink(self):
+        department_ids = self.department_id.ids
+        result = super().unlink()
+        self._establishment_changed(department_ids)
+        return result
+
+    def action_recount(self):
+        self._recount_filled()
+        return True
+
+    def _recount_filled(self):
+        """Reset the filled counters of these lines from the active employees, in one statement"""
+        if not self:
+            return
+        self.flush_recordset(['department_id', 'grade_code', 'approved_posts'])
+        self.env['hr.employee'].flush_model(ESTABLISHMENT_FIELDS)
+        self.env.cr.execute(SQL("""
+            UPDATE mda_hr_establishment est
+               SET filled_count = filled.employee_count,
+                   vacant_count = est.approved_posts - filled.employee_count
+              FROM (
+                    SELECT est.id, COUNT(emp.id) AS employee_count
+                      FROM mda_hr_establishment est
+                 LEFT JOIN hr_employee emp
+                        ON emp.department_id = est.department_id
+                       AND emp.salary_grade_level = est.grade_code
+                       AND emp.employee_status = 'active'
+                       AND emp.active
+                     WHERE est.id IN %s
+                  GROUP BY est.id
+                   ) filled
+             WHERE est.id = filled.id
+        """, tuple(self.ids)))
+        self.invalidate_recordset(['filled_count', 'vacant_count'])
+
+    @api.model
+    def _update_filled_counts(self, filled_before, filled_after, strict=False):
+        """
+        Apply the difference between two {(department id, grade code): employee count} maps to
+        the counters. Releases are applied before take-ups, each in key order so concurrent
+        transactions lock the lines in the same order. In strict mode (promotions) a take-up
+        beyond the approved posts raises instead of oversubscribing the grade: the guarded
+        UPDATE locks the line, so a concurrent promotion waits for it and sees the new count.
+        """
+        deltas = {
+            key: filled_after.get(key, 0) - filled_before.get(key, 0)
+            for key in set(filled_before) | set(filled_after)
+        }
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        self.flush_model(['department_id', 'grade_code', 'approved_posts'])
+        ordered = sorted(deltas.items(), key=lambda item: (item[1] > 0, item[0]))
+        for (department_id, grade), delta in ordered:
+            self.env.cr.execute(SQL("""
+                UPDATE mda_hr_establishment
+                   SET filled_count = GREATEST(filled_count + %(delta)s, 0),
+                       vacant_count = approved_posts - GREATEST(filled_count + %(delta)s, 0)
+                 WHERE department_id = %(department_id)s AND grade_code = %(grade)s
+                   AND (%(delta)s < 0 OR NOT %(strict)s OR filled_count + %(delta)s <= approved_posts)
+             RETURNING id
+            """, delta=delta, department_id=department_id, grade=grade, strict=bool(strict)))
+            if strict and delta > 0 and not self.env.cr.rowcount:
+                raise UserError(_(
+                    "No vacant approved post on grade level %(grade)s in %(department)s.",
+                    grade=grade, department=self.env['hr.department'].browse(department_id).display_name,
+                ))
+        self.invalidate_model(['filled_count', 'vacant_count'])
+        self._establishment_changed({department_id for department_id, _grade in deltas})
+
+    @api.model
+    def _establishment_changed(self, department_ids):
+        """
+        Refresh what reads the vacancy counters: open promotions' eligibility and the report.
+        Eligibility is recomputed once per transaction, before it commits, for all the departments
+        changed meanwhile: a bulk import changes the counters once per chunk.
+        """
+        self.env['hr.employee'].invalidate_model(['promotion_vacancy_available'])
+        precommit = self.env.cr.precommit
+        pending = precommit.data.get('mda_hr.establishment_changed')
+        if pending is None:
+            pending = precommit.data['mda_hr.establishment_changed'] = set()
+            env = self.env
+
+            def recompute_eligibility():
+                department_ids = precommit.data.pop('mda_hr.establishment_changed', set())
+                histories = env['mda.hr.promotion.history'].search([
+                    ('state', '!=', 'implemented'),
+                    ('employee_id.department_id', 'in', list(department_ids)),
+                ])
+                histories._recompute_promotion_eligibility()
+            precommit.add(recompute_eligibility)
+        pending.update(department_ids)
+        self.env['mda.promotion.report']._schedule_refresh()
+
+    @api.model
+    def _get_vacancy_keys(self, department_ids, grades):
+        """
+        Read the vacancy counters for the given departments and current grades in one query.
+        Returns set: {(department id, current grade code)} with a vacant post on the next grade
+        """
+        if not department_ids or not grades:
+            return set()
+        self.flush_model(['department_id', 'grade_level_id', 'approved_posts', 'filled_count'])
+        self.env['mda.hr.grade.level'].flush_model(['code', 'salary_structure', 'level', 'rank_order'])
+        self.env.cr.execute(SQL("""
+            SELECT est.department_id, gl.code
+              FROM mda_hr_grade_level gl
+              JOIN mda_hr_establishment est ON est.grade_level_id = %s
+             WHERE gl.code = ANY(%s) AND est.department_id = ANY(%s)
+               AND est.filled_count < est.approved_posts
+        """, SQL(NEXT_GRADE_SQL), list(grades), list(department_ids)))
+        return set(self.env.cr.fetchall())
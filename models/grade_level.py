@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+from ..constants import SALARY_GRADE_LEVELS
+from .establishment import NEXT_GRADE_SQL
+from ..roll_parser import grade_signature
+
+# Maturity period applied to grades missing from the grade level table
+DEFAULT_MATURITY_YEARS = 3
+
+
+def maturity_years_for_level(level):
+    """Maturity period rule: GL 1-5 two years, GL 6-12 three years, GL 13+ four years."""
+    if level <= 5:
+        return 2
+    elif level <= 12:
+        return 3
+    return 4
+
+
+class HrGradeLevel(models.Model):
+    _name = 'mda.hr.grade.level'
+    _description = 'Salary Grade Level'
+    _order = 'rank_order, code'
+
+    # The unique constraint's index backs the join from hr_employee.salary_grade_level
+    code = fields.Char(string='Code', required=True,
+                       help='Matches the Salary Grade Level key stored on employees (e.g. conhess_07)')
+    name = fields.Char(string='Grade Level', required=True)
+    salary_structure = fields.Char(string='Salary Structure')
+    level = fields.Integer(string='Numeric Level')
+    maturity_years = fields.Integer(string='Maturity Period (Years)', default=DEFAULT_MATURITY_YEARS)
+    rank_order = fields.Integer(string='Rank Order', help='Seniority order across all salary structures')
+
+    _sql_constraints = [
+        ('code_unique', 'unique(code)', 'Grade level code must be unique.'),
+    ]
+
+    @api.model
+    def _seed_from_constants(self):
+        """Create the grade levels of SALARY_GRADE_LEVELS that are not in the table yet."""
+        existing = set(self.search([]).mapped('code'))
+        vals_list = []
+        for sequence, (code, label) in enumerate(SALARY_GRADE_LEVELS, start=1):
+            if code in existing:
+                continue
+            structure, level = grade_signature(code)
+            vals_list.append({
+                'code': code,
+                'name': label,
+                'salary_structure': structure,
+                'level': level,
+                'maturity_years': maturity_years_for_level(level),
+                'rank_order': sequence * 10,
+            })
+        return self.create(vals_list)
+
+    @api.model
+    @tools.ormcache()
+    def _get_maturity_years_by_code(self):
+        """Cached {grade code: maturity years}, shared by all eligibility checks."""
+        self.flush_model(['code', 'maturity_years'])
+        self.env.cr.execute("SELECT code, maturity_years FROM mda_hr_grade_level")
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def get_maturity_years(self, grade):
+        """Maturity period for a salary grade level key (0 when no grade is set)."""
+        if not grade:
+            return 0
+        return self._get_maturity_years_by_code().get(grade, DEFAULT_MATURITY_YEARS)
+
+    @api.model
+    def _get_next_grade_codes(self, codes):
+        """Returns dict: {grade code: code of the next grade level of the same salary structure}"""
+        if not codes:
+            return {}
+        self.flush_model(['code', 'salary_structure', 'level', 'rank_order'])
+        self.env.cr.execute(SQL("""
+            SELECT gl.code, nxt.code
+              FROM mda_hr_grade_level gl
+              JOIN mda_hr_grade_level nxt ON nxt.id = %s
+             WHERE gl.code = ANY(%s)
+        """, SQL(NEXT_GRADE_SQL), list(codes)))
+        return dict(self.env.cr.fetchall())
+
+    def _recompute_promotion_eligibility(self, codes):
+        """Refresh the stored eligibility of open promotions of employees on the given grades"""
+        histories = self.env['mda.hr.promotion.history'].search([
+            ('state', '!=', 'implemented'),
+            ('employee_id.salary_grade_level', 'in', list(codes)),
+        ])
+        histories._recompute_promotion_eligibility()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        self._recompute_promotion_eligibility(records.mapped('code'))
+        return records
+
+    def write(self, vals):
+        codes = set(self.mapped('code'))
+        result = super().write(vals)
+        self.env.registry.clear_cache()
+        if 'code' in vals or 'maturity_years' in vals:
+            self._recompute_promotion_eligibility(codes | set(self.mapped('code')))
+        return result
+
+    def unlink(self):
+        codes = self.mapped('code')
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        self._recompute_promotion_eligibility(codes)
+        return result
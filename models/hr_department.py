@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class HrDepartment(models.Model):
+    _inherit = 'hr.department'
+
+    def write(self, vals):
+        result = super().write(vals)
+        # Department names are printed on the reports
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return result
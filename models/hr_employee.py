@@ -2,9 +2,101 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-from datetime import date
+from odoo.osv import expression
+from odoo.tools import split_every, escape_psql
+from odoo.tools.sql import create_index
+import logging
+import math
+from collections import Counter
+from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
-from ..constants import SALARY_GRADE_LEVELS, NIGERIAN_STATES, GEO_POLITICAL_ZONE_MAPPING
+from ..constants import (
+    SALARY_GRADE_LEVELS, NIGERIAN_STATES, GEO_POLITICAL_ZONE_MAPPING,
+    QUALIFICATION_LEVELS, EXTENDED_SERVICE_LEVELS,
+)
+from ..roll_parser import (
+    ROLL_FIELDS, build_name, normalise_rsa_pin, normalise_qualification_level, normalise_pfa,
+)
+from .grade_level import DEFAULT_MATURITY_YEARS
+from .establishment import ESTABLISHMENT_FIELDS, VACANCY_AVAILABLE_SQL
+from .profile_log import profiled_compute
+from .employee_snapshot import SNAPSHOT_FIELDS
+from .workforce_kpi import KPI_DIMENSIONS, KPI_FIELDS, KPI_STATUS_DIMENSION
+
+_logger = logging.getLogger(__name__)
+
+# Smallest number of days for which _compute_is_confirmed's days / 365.25 >= 2 holds
+CONFIRMATION_DAYS = math.ceil(2 * 365.25)
+
+DATE_BOUNDARY_BATCH_SIZE = 1000
+
+# Partial indexes over the active roll, following the report filters and SQL views:
+# (index name, columns, WHERE clause)
+EMPLOYEE_INDEXES = [
+    ('hr_employee_mda_status_appointment_idx', ['employee_status', 'date_first_appointment'], 'active'),
+    ('hr_employee_mda_state_status_idx', ['state_of_origin', 'employee_status'], 'active'),
+    ('hr_employee_mda_department_grade_idx', ['department_id', 'salary_grade_level'],
+     "active AND employee_status = 'active'"),
+    # Prefix (LIKE 'TA-15%') and exact lookups of the name search
+    ('hr_employee_mda_file_number_prefix_idx', ['file_number varchar_pattern_ops'], ''),
+    ('hr_employee_mda_ippis_prefix_idx', ['ippis varchar_pattern_ops'], ''),
+    ('hr_employee_mda_rsa_pin_prefix_idx', ['rsa_pin varchar_pattern_ops'], ''),
+    # Changed-since pages of the roll API
+    ('hr_employee_mda_write_date_idx', ['write_date', 'id'], ''),
+]
+
+# Inputs of the promotion eligibility criteria, read in one query per recordset
+ELIGIBILITY_FIELDS = [
+    'is_confirmed', 'date_confirmed', 'salary_grade_level', 'department_id',
+    'has_disciplinary_case', 'passed_promotion_exam',
+]
+
+# Employee columns copied into the materialised promotion report
+PROMOTION_REPORT_FIELDS = ELIGIBILITY_FIELDS + [
+    'name', 'file_number', 'rank', 'date_present_appointment', 'active',
+]
+
+
+def _is_maturity_met(date_confirmed, maturity_years, today):
+    if not date_confirmed:
+        return False
+    return (today - date_confirmed).days / 365.25 >= maturity_years
+
+
+def _evaluate_promotion_eligibility(values, today):
+    """
+    Apply the five promotion criteria to one employee's eligibility inputs.
+    Returns tuple: (is_eligible, reasons_for_ineligibility)
+    """
+    reasons = []
+    grade = values['salary_grade_level'] or False
+    maturity_years = values['maturity_years']
+
+    # 1. Check confirmation status
+    if not values['is_confirmed']:
+        reasons.append('Staff must be confirmed (2 years from present appointment)')
+
+    # 2. Check maturity period
+    if not _is_maturity_met(values['date_confirmed'], maturity_years, today):
+        if values['date_confirmed']:
+            years_remaining = maturity_years - ((today - values['date_confirmed']).days / 365.25)
+            reasons.append(f'Maturity period not met. Grade {grade} requires {maturity_years} years. {years_remaining:.1f} years remaining.')
+        else:
+            reasons.append(f'Maturity period not met for grade level {grade} ({maturity_years} years required)')
+
+    # 3. Check disciplinary cases
+    if values['has_disciplinary_case']:
+        reasons.append('Staff has disciplinary case(s)')
+
+    # 4. Check vacancy availability
+    if not values['promotion_vacancy_available']:
+        reasons.append('No promotion vacancy available')
+
+    # 5. Check promotion exam
+    if not values['passed_promotion_exam']:
+        reasons.append('Staff must pass promotion exam')
+
+    return len(reasons) == 0, reasons
 
 
 class HrEmployee(models.Model):
@@ -30,13 +122,16 @@ class HrEmployee(models.Model):
         ('attachment', 'Attachment'),
     ], 'Appointment Type', default='contract')
 
-    date_first_appointment = fields.Date('Date of First Appointment')
-    date_present_appointment = fields.Date('Date of Present Appointment')
-    retirement_date = fields.Date('Retirement Date', compute='_compute_retirement_date', store=True)
+    date_first_appointment = fields.Date('Date of First Appointment', index=True)
+    date_present_appointment = fields.Date('Date of Present Appointment', index=True)
+    retirement_date = fields.Date('Retirement Date', compute='_compute_retirement_date', store=True, index=True)
 
     # Pension & Financial
     rsa_pin = fields.Char('RSA PIN')
     pfa_name = fields.Char('PFA Name')
+    pfa_partner_id = fields.Many2one(
+        'res.partner', 'PFA', compute='_compute_pfa_partner_id', store=True, index=True,
+        help='Pension fund administrator recognised from the PFA Name')
 
     # Geographical Information
     state_of_origin = fields.Selection(NIGERIAN_STATES, 'State of Origin')
@@ -66,6 +161,9 @@ class HrEmployee(models.Model):
     # Qualification & Job
     age_on_entry = fields.Integer('Age on Entry', compute='_compute_age_on_entry', store=True)
     qualification = fields.Char('Qualification')
+    qualification_level = fields.Selection(
+        QUALIFICATION_LEVELS, 'Qualification Level', compute='_compute_qualification_level',
+        store=True, index=True, help='Highest qualification recognised from the Qualification text')
     nature_of_desc = fields.Char('Nature of Description')
     job_description = fields.Text('Job Description')
     salary_structure = fields.Selection([
@@ -78,16 +176,35 @@ class HrEmployee(models.Model):
     ], 'Salary Structure')
 
     # Override the name field from base model
-    name = fields.Char('Employee Name')
+    name = fields.Char('Employee Name', index='trigram')
 
     # Promotion tracking
     promotion_history_ids = fields.One2many(
         'mda.hr.promotion.history', 'employee_id', string='Promotion History'
     )
 
+    # Grade, rank, department and status over time, for "as of" reports
+    snapshot_ids = fields.One2many('mda.hr.employee.snapshot', 'employee_id', string='Service Record')
+
     next_promotion_due = fields.Date(
         string='Next Promotion Due',
-        compute='_compute_next_promotion_due', store=True
+        compute='_compute_next_promotion_due', store=True, index=True
+    )
+
+    # Date boundary flags, refreshed nightly by _cron_refresh_date_boundaries
+    is_promotion_due = fields.Boolean(
+        string='Promotion Due',
+        compute='_compute_date_boundary_flags',
+        store=True,
+        index=True,
+        help='Next promotion due date has been reached'
+    )
+    is_retirement_due = fields.Boolean(
+        string='Retirement Due',
+        compute='_compute_date_boundary_flags',
+        store=True,
+        index=True,
+        help='Retirement date has been reached'
     )
 
     # Promotion eligibility fields
@@ -117,15 +234,67 @@ class HrEmployee(models.Model):
     )
     promotion_vacancy_available = fields.Boolean(
         string='Promotion Vacancy Available',
-        default=False,
-        help='Is there a vacancy for promotion in the target grade?'
+        compute='_compute_promotion_vacancy_available',
+        help='Is there a vacant approved post on the next grade level in the department (grade establishment)?'
+    )
+
+    # Nominal roll sync
+    roll_hash = fields.Char(
+        string='Roll Content Hash',
+        index=True,
+        copy=False,
+        readonly=True,
+        help='Digest of the roll row this employee was last imported or synced from'
     )
 
+    # The unique indexes lead with the identifier, so they also serve lookups across companies
+    _sql_constraints = [
+        ('ippis_company_unique', 'unique(ippis, company_id)', 'IPPIS number must be unique per company.'),
+        ('file_number_company_unique', 'unique(file_number, company_id)', 'File number must be unique per company.'),
+    ]
+
+    def init(self):
+        super().init()
+        for indexname, columns, where in EMPLOYEE_INDEXES:
+            create_index(self.env.cr, indexname, self._table, columns, where=where)
+
     @api.model
+    def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
+        """
+        Match file number, IPPIS and RSA PIN before the name: exact identifiers first, then
+        identifier prefixes, then the (trigram indexed) name search, each limited to what is left.
+        """
+        term = (name or '').strip()
+        if not term or operator != 'ilike':
+            return super()._name_search(name, domain, operator, limit=limit, order=order)
+
+        # Identifiers are stored upper case (RSA PINs without spaces or dashes)
+        lookups = {'file_number': term.upper(), 'ippis': term.upper(), 'rsa_pin': normalise_rsa_pin(term)}
+        lookups = {fname: value for fname, value in lookups.items() if value}
+        tiers = [
+            expression.OR(
+                [[(fname, 'in', list({value, term}))] for fname, value in lookups.items()]),
+            expression.OR(
+                [[(fname, '=like', escape_psql(value) + '%')] for fname, value in lookups.items()]),
+        ]
+        employee_ids = []
+        for tier in tiers:
+            tier_domain = expression.AND([domain or [], tier, [('id', 'not in', employee_ids)]])
+            employee_ids += list(self._search(tier_domain, limit=limit and limit - len(employee_ids), order=order))
+            if limit and len(employee_ids) >= limit:
+                return employee_ids
+        name_domain = expression.AND([domain or [], [('id', 'not in', employee_ids)]])
+        remaining = limit and limit - len(employee_ids)
+        return employee_ids + list(super()._name_search(name, name_domain, operator, limit=remaining, order=order))
+
+    @api.model_create_multi
     def create(self, vals_list):
         """Create employee records with validation and auto-name generation."""
         # Process each record in the batch
         for vals in vals_list:
+            if vals.get('rsa_pin'):
+                vals['rsa_pin'] = normalise_rsa_pin(vals['rsa_pin'])
+
             # Validate date constraints
             if vals.get('date_first_appointment') and vals.get('date_present_appointment'):
                 if vals['date_present_appointment'] < vals['date_first_appointment']:
@@ -144,10 +313,21 @@ class HrEmployee(models.Model):
                     name_parts.append(vals['middle_name'])
                 vals['name'] = ' '.join(name_parts)
         
-        return super().create(vals_list)
+        employees = super().create(vals_list)
+        self.env['mda.hr.establishment']._update_filled_counts(
+            {}, employees._get_establishment_keys(),
+            strict=self.env.context.get('mda_hr_establishment_strict'))
+        self.env['mda.hr.workforce.kpi']._apply_deltas({}, employees._get_kpi_keys())
+        self.env['mda.promotion.report']._schedule_refresh()
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        self.env['mda.hr.employee.snapshot']._record_changes(
+            employees, self.env.context.get('mda_hr_snapshot_date'))
+        return employees
 
     def write(self, vals):
         """Write records with validation."""
+        if vals.get('rsa_pin'):
+            vals = dict(vals, rsa_pin=normalise_rsa_pin(vals['rsa_pin']))
         # Validate date constraints
         if any(field in vals for field in ['date_first_appointment', 'date_present_appointment']):
             for record in self:
@@ -158,36 +338,106 @@ class HrEmployee(models.Model):
                         "Date of Present Appointment cannot be before Date of First Appointment."
                     ))
         
+        if any(field in vals for field in PROMOTION_REPORT_FIELDS):
+            self.env['mda.promotion.report']._schedule_refresh()
+
+        # Posts filled before the write, to move the establishment counters afterwards
+        filled_before = None
+        if any(field in vals for field in ESTABLISHMENT_FIELDS):
+            filled_before = self._get_establishment_keys()
+        counted_before = None
+        if any(field in vals for field in KPI_FIELDS):
+            counted_before = self._get_kpi_keys()
+
+        # A manual edit of a roll field forces the next IPPIS sync to diff this employee
+        if not self.env.context.get('mda_hr_roll_sync') and any(field in vals for field in ROLL_FIELDS):
+            vals = dict(vals, roll_hash=False)
+
         # Update name from name parts if any changed
-        if any(field in vals for field in ['surname', 'first_name', 'middle_name']):
+        if any(field in vals for field in ['surname', 'first_name', 'middle_name']) and not vals.get('name'):
+            # Names differ per record, so write each distinct name with its own records
+            ids_by_name = {}
             for record in self:
-                name_parts = []
-                surname = vals.get('surname', record.surname)
-                first_name = vals.get('first_name', record.first_name)
-                middle_name = vals.get('middle_name', record.middle_name)
-                
-                if surname:
-                    name_parts.append(surname)
-                if first_name:
-                    name_parts.append(first_name)
-                if middle_name:
-                    name_parts.append(middle_name)
-                
-                if name_parts and not vals.get('name'):
-                    vals['name'] = ' '.join(name_parts)
-        return super().write(vals)
+                name = build_name(
+                    vals.get('surname', record.surname),
+                    vals.get('first_name', record.first_name),
+                    vals.get('middle_name', record.middle_name),
+                )
+                ids_by_name.setdefault(name, []).append(record.id)
+            for name, record_ids in ids_by_name.items():
+                records_vals = dict(vals, name=name) if name else vals
+                super(HrEmployee, self.browse(record_ids)).write(records_vals)
+            result = True
+        else:
+            result = super().write(vals)
+
+        if filled_before is not None:
+            self.env['mda.hr.establishment']._update_filled_counts(
+                filled_before, self._get_establishment_keys(),
+                strict=self.env.context.get('mda_hr_establishment_strict'))
+        if counted_before is not None:
+            self.env['mda.hr.workforce.kpi']._apply_deltas(counted_before, self._get_kpi_keys())
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        if any(field in vals for field in SNAPSHOT_FIELDS):
+            # Dated by the caller (promotion effective date), today otherwise
+            self.env['mda.hr.employee.snapshot']._record_changes(
+                self, self.env.context.get('mda_hr_snapshot_date'))
+        return result
+
+    def unlink(self):
+        filled_before = self._get_establishment_keys()
+        counted_before = self._get_kpi_keys()
+        result = super().unlink()
+        self.env['mda.hr.establishment']._update_filled_counts(filled_before, {})
+        self.env['mda.hr.workforce.kpi']._apply_deltas(counted_before, {})
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return result
+
+    def _get_establishment_keys(self):
+        """Posts filled by these employees. Returns Counter: {(department id, grade code): employees}"""
+        return Counter(
+            (employee.department_id.id, employee.salary_grade_level)
+            for employee in self
+            if employee.active and employee.employee_status == 'active'
+            and employee.department_id and employee.salary_grade_level
+        )
+
+    def _get_kpi_keys(self):
+        """
+        Workforce KPI counters these employees count in: the status of every active record, the
+        other dimensions for the staff in service. Dates count in their year or month bucket.
+        Returns Counter: {(company id, dimension, key): employees}
+        """
+        keys = Counter()
+        status_dimension, status_field = KPI_STATUS_DIMENSION
+        for employee in self:
+            if not employee.active:
+                continue
+            company_id = employee.company_id.id
+            keys[(company_id, status_dimension, employee[status_field] or '')] += 1
+            if employee.employee_status != 'active':
+                continue
+            for dimension, fname, date_formats in KPI_DIMENSIONS:
+                value = employee[fname]
+                if date_formats:
+                    value = value and value.strftime(date_formats[1])
+                keys[(company_id, dimension, value or '')] += 1
+        return keys
 
     @api.depends('birthday', 'qualification')
+    @profiled_compute
     def _compute_retirement_date(self):
         for rec in self:
             if rec.birthday:
                 birth_year = rec.birthday.year
-                retirement_age = 65 if rec.qualification and rec.qualification.lower() in ['phd', 'master'] else 60
+                level = normalise_qualification_level(rec.qualification)
+                retirement_age = 65 if level in EXTENDED_SERVICE_LEVELS else 60
                 rec.retirement_date = date(birth_year + retirement_age, rec.birthday.month, rec.birthday.day)
             else:
                 rec.retirement_date = False
 
     @api.depends('birthday', 'date_first_appointment')
+    @profiled_compute
     def _compute_age_on_entry(self):
         for rec in self:
             if rec.birthday and rec.date_first_appointment:
@@ -201,12 +451,42 @@ class HrEmployee(models.Model):
             else:
                 rec.age_on_entry = 0
 
+    @api.depends('qualification')
+    @profiled_compute
+    def _compute_qualification_level(self):
+        """Classified once per distinct qualification text (the classifier is memoised)."""
+        for rec in self:
+            rec.qualification_level = normalise_qualification_level(rec.qualification)
+
+    @api.depends('pfa_name')
+    @profiled_compute
+    def _compute_pfa_partner_id(self):
+        partner_ids = {}
+        for rec in self:
+            xmlid = normalise_pfa(rec.pfa_name)
+            if xmlid not in partner_ids:
+                partner_ids[xmlid] = xmlid and self.env['ir.model.data']._xmlid_to_res_id(
+                    'mda_hr.%s' % xmlid, raise_if_not_found=False)
+            rec.pfa_partner_id = partner_ids[xmlid] or False
+
+    @api.model
+    def _recompute_pfa_partners(self):
+        """
+        Recognise the PFA of every employee with a PFA Name again. Run once the PFA partners are
+        loaded: the column is first computed on upgrade before they exist.
+        """
+        employees = self.with_context(active_test=False).search([('pfa_name', '!=', False)])
+        self.env.add_to_compute(self._fields['pfa_partner_id'], employees)
+        employees.flush_recordset(['pfa_partner_id'])
+
     @api.depends('state_of_origin')
+    @profiled_compute
     def _compute_geo_political_zone(self):
         for rec in self:
             rec.geo_political_zone = GEO_POLITICAL_ZONE_MAPPING.get(rec.state_of_origin, False)
 
     @api.depends('promotion_history_ids.effective_date', 'date_present_appointment')
+    @profiled_compute
     def _compute_next_promotion_due(self):
         """Calculate next promotion due date (minimum 3 years between promotions)."""
         for emp in self:
@@ -219,7 +499,16 @@ class HrEmployee(models.Model):
             else:
                 emp.next_promotion_due = False
 
+    @api.depends('department_id', 'salary_grade_level')
+    def _compute_promotion_vacancy_available(self):
+        """Read the establishment vacancy counters of the next grade level, once for the recordset."""
+        vacancies = self.env['mda.hr.establishment']._get_vacancy_keys(
+            set(self.department_id.ids), set(self.mapped('salary_grade_level')) - {False})
+        for emp in self:
+            emp.promotion_vacancy_available = (emp.department_id.id, emp.salary_grade_level) in vacancies
+
     @api.depends('date_present_appointment', 'date_confirmed')
+    @profiled_compute
     def _compute_is_confirmed(self):
         """Check if employee is confirmed (2 years from present appointment)."""
         for emp in self:
@@ -233,65 +522,169 @@ class HrEmployee(models.Model):
             else:
                 emp.is_confirmed = False
 
+    @api.depends('next_promotion_due', 'retirement_date')
+    @profiled_compute
+    def _compute_date_boundary_flags(self):
+        """Flag employees whose next promotion or retirement date has been reached."""
+        today = date.today()
+        for emp in self:
+            emp.is_promotion_due = bool(emp.next_promotion_due and emp.next_promotion_due <= today)
+            emp.is_retirement_due = bool(emp.retirement_date and emp.retirement_date <= today)
+
+    @api.model
+    def _cron_refresh_date_boundaries(self, batch_size=DATE_BOUNDARY_BATCH_SIZE):
+        """
+        Recompute the stored fields that depend on today's date, only for employees whose
+        confirmation, promotion due or retirement boundary was crossed since the last run.
+        """
+        today = date.today()
+        params = self.env['ir.config_parameter'].sudo()
+        last_run = fields.Date.to_date(params.get_param('mda_hr.date_boundary_last_run'))
+
+        refreshed = {}
+        for fname, domain in self._get_date_boundary_domains(today, last_run).items():
+            field = self._fields[fname]
+            employee_ids = self.search(domain).ids
+            for batch_ids in split_every(batch_size, employee_ids):
+                employees = self.browse(batch_ids)
+                self.env.add_to_compute(field, employees)
+                # also marks the stored fields depending on it (promotion eligibility)
+                employees.modified([fname])
+                self.env.flush_all()
+                self.env.invalidate_all()
+            refreshed[fname] = len(employee_ids)
+
+        # Stored eligibility of open promotions changes once the maturity period has elapsed
+        histories = self.env['mda.hr.promotion.history'].search([
+            ('state', '!=', 'implemented'),
+            ('employee_id', 'any', self._get_maturity_boundary_domain(today, last_run)),
+        ])
+        histories._recompute_promotion_eligibility(batch_size)
+        refreshed['is_promotion_eligible'] = len(histories)
+
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        params.set_param('mda_hr.date_boundary_last_run', fields.Date.to_string(today))
+        _logger.info("Date boundary refresh since %s: %s", last_run or 'first run', refreshed)
+        return refreshed
+
+    @api.model
+    def _get_date_boundary_domains(self, today, last_run=None):
+        """
+        Indexed range domains selecting the employees whose boundary fell in (last_run, today].
+        Without a previous run every stale employee is selected once.
+        """
+        confirmation_cutoff = today - timedelta(days=CONFIRMATION_DAYS)
+        domains = {
+            'is_confirmed': [
+                ('is_confirmed', '=', False),
+                ('date_confirmed', '=', False),
+                ('date_present_appointment', '<=', confirmation_cutoff),
+            ],
+            'is_promotion_due': [
+                ('is_promotion_due', '=', False),
+                ('next_promotion_due', '<=', today),
+            ],
+            'is_retirement_due': [
+                ('is_retirement_due', '=', False),
+                ('retirement_date', '<=', today),
+            ],
+        }
+        if last_run:
+            domains['is_confirmed'].append(
+                ('date_present_appointment', '>', last_run - timedelta(days=CONFIRMATION_DAYS)))
+            domains['is_promotion_due'].append(('next_promotion_due', '>', last_run))
+            domains['is_retirement_due'].append(('retirement_date', '>', last_run))
+        return domains
+
+    @api.model
+    def _get_maturity_boundary_domain(self, today, last_run=None):
+        """
+        Employees whose maturity period elapsed in (last_run, today]: per maturity period, the
+        grades with it and a confirmation date that many days before that window.
+        Without a previous run every confirmed employee is selected once.
+        """
+        if not last_run:
+            return [('date_confirmed', '<=', today)]
+        maturity_by_code = self.env['mda.hr.grade.level']._get_maturity_years_by_code()
+        codes_by_days = {}
+        for code, years in maturity_by_code.items():
+            codes_by_days.setdefault(math.ceil(years * 365.25), []).append(code)
+        # (grade condition, days of the maturity period); no grade means no maturity period
+        grade_conditions = [
+            ([('salary_grade_level', 'in', codes)], days) for days, codes in codes_by_days.items()
+        ]
+        grade_conditions += [
+            ([('salary_grade_level', 'not in', list(maturity_by_code)), ('salary_grade_level', '!=', False)],
+             math.ceil(DEFAULT_MATURITY_YEARS * 365.25)),
+            ([('salary_grade_level', '=', False)], 0),
+        ]
+        return expression.OR([
+            grade_domain + [
+                ('date_confirmed', '>', last_run - timedelta(days=days)),
+                ('date_confirmed', '<=', today - timedelta(days=days)),
+            ]
+            for grade_domain, days in grade_conditions
+        ])
+
     def get_maturity_period_years(self):
         """Get maturity period based on current salary grade level."""
-        if not self.salary_grade_level:
-            return 0
-        
-        try:
-            grade_level = int(self.salary_grade_level)
-            if grade_level <= 5:
-                return 2
-            elif grade_level <= 12:
-                return 3
-            else:  # grade_level >= 14
-                return 4
-        except (ValueError, TypeError):
-            return 3  # Default to 3 years
+        return self.env['mda.hr.grade.level'].get_maturity_years(self.salary_grade_level)
 
     def is_maturity_period_met(self):
         """Check if maturity period requirement is met after confirmation."""
-        if not self.date_confirmed:
-            return False
-        
-        maturity_years = self.get_maturity_period_years()
-        years_since_confirmation = (date.today() - self.date_confirmed).days / 365.25
-        return years_since_confirmation >= maturity_years
+        return _is_maturity_met(self.date_confirmed, self.get_maturity_period_years(), date.today())
 
     def check_promotion_eligibility(self):
         """
         Check if employee is eligible for promotion.
         Returns tuple: (is_eligible, reasons_for_ineligibility)
         """
-        reasons = []
-        
-        # 1. Check confirmation status
-        if not self.is_confirmed:
-            reasons.append('Staff must be confirmed (2 years from present appointment)')
-        
-        # 2. Check maturity period
-        if not self.is_maturity_period_met():
-            maturity_years = self.get_maturity_period_years()
-            if self.date_confirmed:
-                years_remaining = maturity_years - ((date.today() - self.date_confirmed).days / 365.25)
-                reasons.append(f'Maturity period not met. Grade {self.salary_grade_level} requires {maturity_years} years. {years_remaining:.1f} years remaining.')
-            else:
-                reasons.append(f'Maturity period not met for grade level {self.salary_grade_level} ({maturity_years} years required)')
-        
-        # 3. Check disciplinary cases
-        if self.has_disciplinary_case:
-            reasons.append('Staff has disciplinary case(s)')
-        
-        # 4. Check vacancy availability
-        if not self.promotion_vacancy_available:
-            reasons.append('No promotion vacancy available')
-        
-        # 5. Check promotion exam
-        if not self.passed_promotion_exam:
-            reasons.append('Staff must pass promotion exam')
-        
-        is_eligible = len(reasons) == 0
-        return is_eligible, reasons
+        self.ensure_one()
+        return self._get_promotion_eligibility_map()[self.id]
+
+    def _get_promotion_eligibility_map(self, today=None):
+        """
+        Evaluate the five promotion criteria for every employee of the recordset in one pass.
+        Returns dict: {employee_id: (is_eligible, reasons_for_ineligibility)}
+        """
+        today = today or date.today()
+        return {
+            employee_id: _evaluate_promotion_eligibility(values, today)
+            for employee_id, values in self._read_eligibility_values().items()
+        }
+
+    def _read_eligibility_values(self):
+        """
+        Read the eligibility inputs, with the grade maturity period joined in, in a single query.
+        Unsaved records are read from the cache and the in-process grade level lookup.
+        """
+        values_by_id = {}
+        real_ids = [employee_id for employee_id in self.ids if isinstance(employee_id, int)]
+        if real_ids:
+            self.browse(real_ids).flush_recordset(ELIGIBILITY_FIELDS)
+            self.env['mda.hr.grade.level'].flush_model(['code', 'maturity_years', 'salary_structure', 'level'])
+            self.env['mda.hr.establishment'].flush_model()
+            self.env.cr.execute("""
+                SELECT emp.id, emp.is_confirmed, emp.date_confirmed, emp.salary_grade_level,
+                       emp.has_disciplinary_case, emp.passed_promotion_exam,
+                       %s AS promotion_vacancy_available,
+                       CASE WHEN emp.salary_grade_level IS NULL THEN 0
+                            ELSE COALESCE(gl.maturity_years, %%s)
+                       END AS maturity_years
+                  FROM hr_employee emp
+             LEFT JOIN mda_hr_grade_level gl ON gl.code = emp.salary_grade_level
+                 WHERE emp.id = ANY(%%s)
+            """ % VACANCY_AVAILABLE_SQL, [DEFAULT_MATURITY_YEARS, real_ids])
+            for row in self.env.cr.dictfetchall():
+                values_by_id[row.pop('id')] = row
+        grade_levels = self.env['mda.hr.grade.level']
+        for employee in self:
+            if employee.id not in values_by_id:
+                values = {fname: employee[fname] for fname in ELIGIBILITY_FIELDS}
+                values['promotion_vacancy_available'] = employee.promotion_vacancy_available
+                values['maturity_years'] = grade_levels.get_maturity_years(employee.salary_grade_level)
+                values_by_id[employee.id] = values
+        return values_by_id
 
     def implement_promotion(self, promotion_history_id):
         """Implement an approved promotion."""
@@ -299,11 +692,6 @@ class HrEmployee(models.Model):
         if promo.state != 'approved':
             raise UserError(_("Promotion must be approved before implementation."))
 
-        emp = promo.employee_id
-        emp.write({
-            'salary_grade_level': promo.new_salary_grade_level,
-            'rank': promo.new_rank,
-            'date_present_appointment': promo.effective_date
-        })
-
-        promo.write({'state': 'implemented'})
+        _implemented, failures = promo._implement_promotions()
+        if failures:
+            raise UserError(failures[0][1])
@@ -1,8 +1,49 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
+import logging
+from collections import namedtuple
 from datetime import date, timedelta
 from ..constants import NIGERIAN_STATES
+from ..report_cache import report_cache
+from .report_export import EXPORT_FORMATS
+
+_logger = logging.getLogger(__name__)
+
+
+REPORT_TYPES = [
+    ('master', 'Employee Master Report'),
+    ('pension', 'Pension Compliance Report'),
+    ('retirement', 'Retirement Schedule Report'),
+    ('geographical', 'Geographical Distribution Report'),
+    ('qualification', 'Qualification Analysis Report'),
+]
+
+REPORT_ACTIONS = {
+    'master': 'mda_hr.action_employee_master_report',
+    'pension': 'mda_hr.action_pension_compliance_report',
+    'retirement': 'mda_hr.action_retirement_schedule_report',
+    'geographical': 'mda_hr.action_geographical_report',
+    'qualification': 'mda_hr.action_qualification_report',
+}
+
+# Wizard filters that select the data of a report (cache key)
+REPORT_FILTERS = ('date_from', 'date_to', 'state_filter', 'employee_status', 'as_of_date')
+
+# Recordset stored in the report cache, browsed again in the environment of each print
+CachedRecords = namedtuple('CachedRecords', ['model', 'ids'])
+
+# Rows per report chunk; each chunk is laid out as its own article and rendered to PDF separately
+REPORT_CHUNK_SIZE = 500
+
+EMPLOYEE_STATUS_FILTER = [
+    ('active', 'Active'),
+    ('inactive', 'Inactive'),
+    ('suspended', 'Suspended'),
+    ('retired', 'Retired'),
+    ('deceased', 'Deceased'),
+    ('terminated', 'Terminated'),
+]
 
 
 class HrEmployeeReport(models.TransientModel):
@@ -11,48 +52,80 @@ class HrEmployeeReport(models.TransientModel):
     _description = 'HR Employee Report Wizard'
     _inherit = ['mail.thread']
 
-    report_type = fields.Selection([
-        ('master', 'Employee Master Report'),
-        ('pension', 'Pension Compliance Report'),
-        ('retirement', 'Retirement Schedule Report'),
-        ('geographical', 'Geographical Distribution Report'),
-        ('qualification', 'Qualification Analysis Report'),
-    ], string='Report Type', required=True, default='master')
+    report_type = fields.Selection(REPORT_TYPES, string='Report Type', required=True, default='master')
 
     date_from = fields.Date(string='From Date')
     date_to = fields.Date(string='To Date')
     
     state_filter = fields.Selection(NIGERIAN_STATES, string='Filter by State')
 
-    employee_status = fields.Selection([
-        ('active', 'Active'),
-        ('inactive', 'Inactive'),
-        ('suspended', 'Suspended'),
-        ('retired', 'Retired'),
-        ('deceased', 'Deceased'),
-        ('terminated', 'Terminated'),
-    ], string='Filter by Status')
+    employee_status = fields.Selection(EMPLOYEE_STATUS_FILTER, string='Filter by Status')
+
+    as_of_date = fields.Date(
+        string='As of Date',
+        help='Staff in service on this date, with their status then; the master report also shows '
+             'their grade, rank and department then')
+
+    export_format = fields.Selection(EXPORT_FORMATS, string='Format', required=True, default='pdf',
+                                     help='CSV is streamed as a download straight from the database. Excel is built in full '
+                                          'first, so its download only starts once the file is complete')
+
+    run_in_background = fields.Boolean(
+        string='Generate in Background',
+        help='Queue the report and receive the PDF in your inbox instead of waiting for it'
+    )
+
+    def _get_report_data(self):
+        """Filters passed to the report engine"""
+        return {
+            'report_type': self.report_type,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'state_filter': self.state_filter,
+            'employee_status': self.employee_status,
+            'as_of_date': self.as_of_date,
+        }
 
     def print_report(self):
         """Generate the selected report"""
-        data = {
+        ProfileLog = self.env['mda.hr.profile.log']
+        operation = '%s (%s)' % (self.report_type, self.export_format)
+        filters = ProfileLog._format_filters(self._get_report_data(), REPORT_FILTERS)
+        with ProfileLog._profile('report_print', operation, filters=filters):
+            return self._print_report()
+
+    def _print_report(self):
+        """Stream the export, queue the job or return the PDF report action"""
+        if self.export_format != 'pdf':
+            return self.env['mda.hr.report.export']._get_export_action(
+                self.report_type, self.export_format, data=self._get_report_data())
+        if self.run_in_background:
+            return self.action_enqueue_report()
+        data = self._get_report_data()
+        return self.env.ref(REPORT_ACTIONS[self.report_type]).report_action(self, data=data)
+
+    def action_enqueue_report(self):
+        """Queue the selected report for background rendering"""
+        self.ensure_one()
+        job = self.env['mda.hr.report.job'].create({
             'report_type': self.report_type,
             'date_from': self.date_from,
             'date_to': self.date_to,
             'state_filter': self.state_filter,
             'employee_status': self.employee_status,
+            'as_of_date': self.as_of_date,
+        })
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Report Queued'),
+                'message': _('%s will be delivered to your inbox when ready.', job.name),
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
         }
-        
-        if self.report_type == 'master':
-            return self.env.ref('mda_hr.action_employee_master_report').report_action(self, data=data)
-        elif self.report_type == 'pension':
-            return self.env.ref('mda_hr.action_pension_compliance_report').report_action(self, data=data)
-        elif self.report_type == 'retirement':
-            return self.env.ref('mda_hr.action_retirement_schedule_report').report_action(self, data=data)
-        elif self.report_type == 'geographical':
-            return self.env.ref('mda_hr.action_geographical_report').report_action(self, data=data)
-        elif self.report_type == 'qualification':
-            return self.env.ref('mda_hr.action_qualification_report').report_action(self, data=data)
 
 
 class HrEmployeeReportPrint(models.AbstractModel):
@@ -60,23 +133,112 @@ class HrEmployeeReportPrint(models.AbstractModel):
     _name = 'mda_hr.employee.report.print'
     _description = 'HR Employee Reports'
 
+    def init(self):
+        super().init()
+        # Report data version: one row per committed change of the data reports are built from
+        self.env.cr.execute("CREATE TABLE IF NOT EXISTS mda_hr_report_version (id bigserial PRIMARY KEY)")
+
     @api.model
     def _get_report_values(self, docids, data=None):
-        """Get report data based on report type"""
+        """Get report data based on report type, from the report cache when the data did not change"""
         report_type = data.get('report_type', 'master')
+        ProfileLog = self.env['mda.hr.profile.log']
+        filters = ProfileLog._format_filters(data, REPORT_FILTERS)
+        key = self._get_report_cache_key(report_type, data)
+        payload = report_cache.get(key)
+        if payload is None:
+            _logger.debug("Report cache miss for %s report: %s", report_type, report_cache.stats())
+            with ProfileLog._profile('report_data', report_type, filters=filters) as probe:
+                payload = self._freeze_report_values(self._compute_report_values(report_type, data))
+                probe['rows'] = len(payload['doc_ids']) or payload.get('total_employees', 0)
+            report_cache.put(key, payload)
+        values = self._thaw_report_values(payload)
+        values.update(company=self.env.company, print_date=fields.Datetime.now())
+        return values
+
+    def _compute_report_values(self, report_type, data):
+        """Query and aggregate the data of a report"""
+        if data.get('as_of_date'):
+            # Staff in service then may have been archived since (departures)
+            self = self.with_context(active_test=False)
         domain = self._get_employee_domain(data)
-        employees = self.env['hr.employee'].search(domain)
         
         if report_type == 'master':
-            return self._get_master_report_data(employees, data)
+            return self._get_master_report_data(domain, data)
         elif report_type == 'pension':
-            return self._get_pension_report_data(employees, data)
+            return self._get_pension_report_data(domain, data)
         elif report_type == 'retirement':
-            return self._get_retirement_report_data(employees, data)
+            return self._get_retirement_report_data(domain, data)
         elif report_type == 'geographical':
-            return self._get_geographical_report_data(employees, data)
+            return self._get_geographical_report_data(domain, data)
         elif report_type == 'qualification':
-            return self._get_qualification_report_data(employees, data)
+            return self._get_qualification_report_data(domain, data)
+
+    @api.model
+    def _get_report_version(self):
+        """
+        Version of the report data, read in this transaction's snapshot: a change committed after
+        the snapshot was taken is always versioned after it (the version moves once it commits).
+        """
+        self.env.cr.execute("SELECT MAX(id) FROM mda_hr_report_version")
+        return self.env.cr.fetchone()[0] or 0
+
+    @api.model
+    def _bump_report_version(self):
+        """
+        Move the report data version once the transaction commits (once per transaction), so
+        every worker computes its cached reports again. Called by the employee, department and
+        promotion history writes and by the date boundary refresh.
+        """
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get('mda_hr.report_version_bump'):
+            return
+        postcommit.data['mda_hr.report_version_bump'] = True
+        registry = self.env.registry
+
+        def bump_version():
+            try:
+                with registry.cursor() as cr:
+                    cr.execute("INSERT INTO mda_hr_report_version DEFAULT VALUES RETURNING id")
+                    version = cr.fetchone()[0]
+                    cr.execute("DELETE FROM mda_hr_report_version WHERE id < %s", [version - 100])
+            except Exception:
+                _logger.warning("Could not move the report data version", exc_info=True)
+        postcommit.add(bump_version)
+
+    def _get_report_cache_key(self, report_type, data):
+        """Report type and filters, scoped to the database, user, companies and language,
+        plus today's date (retirement window, date-based flags) and the data version"""
+        filters = tuple((name, str(data[name])) for name in REPORT_FILTERS if data.get(name))
+        return (
+            self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids), self.env.lang,
+            report_type, filters, date.today(), self._get_report_version(),
+        )
+
+    def _freeze_report_values(self, value):
+        """Copy of report values with recordsets replaced by their ids, safe to keep across requests"""
+        if isinstance(value, models.BaseModel):
+            return CachedRecords(value._name, tuple(value.ids))
+        if isinstance(value, dict):
+            return {key: self._freeze_report_values(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._freeze_report_values(item) for item in value)
+        return value
+
+    def _thaw_report_values(self, value):
+        """Inverse of _freeze_report_values, in the current environment"""
+        if isinstance(value, CachedRecords):
+            return self.env[value.model].browse(value.ids)
+        if isinstance(value, dict):
+            return {key: self._thaw_report_values(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._thaw_report_values(item) for item in value)
+        return value
+
+    @api.model
+    def get_report_cache_stats(self):
+        """Returns dict: report cache size, entries, hits, misses and hit ratio of this worker"""
+        return report_cache.stats()
 
     def _get_employee_domain(self, data):
         """Build domain for employee search based on filters"""
@@ -85,7 +247,12 @@ class HrEmployeeReportPrint(models.AbstractModel):
         if data.get('state_filter'):
             domain.append(('state_of_origin', '=', data['state_filter']))
         
-        if data.get('employee_status'):
+        if data.get('as_of_date'):
+            # Staff with a snapshot on that date, the status filter applying to their status then
+            snapshots = self.env['mda.hr.employee.snapshot']._search_as_of(
+                data['as_of_date'], data.get('employee_status'))
+            domain.append(('snapshot_ids', 'any', snapshots))
+        elif data.get('employee_status'):
             domain.append(('employee_status', '=', data['employee_status']))
         
         if data.get('date_from') and data.get('date_to'):
@@ -96,59 +263,105 @@ class HrEmployeeReportPrint(models.AbstractModel):
         
         return domain
 
-    def _get_master_report_data(self, employees, data):
+    def _get_selection_labels(self, field_name):
+        """Selection key -> label mapping of an hr.employee field, built once per report"""
+        return dict(self.env['hr.employee']._fields[field_name]._description_selection(self.env))
+
+    def _count_by(self, domain, field_name):
+        """Grouped SQL count of employees matching domain, keyed by field value (NULLs skipped)"""
+        groups = self.env['hr.employee']._read_group(
+            domain + [(field_name, '!=', False)], [field_name], ['__count'])
+        return dict(groups)
+
+    def _split_in_chunks(self, records):
+        """Returns list of (offset, records) slices of REPORT_CHUNK_SIZE rows (at least one, possibly empty)"""
+        return [
+            (offset, records[offset:offset + REPORT_CHUNK_SIZE])
+            for offset in range(0, max(len(records), 1), REPORT_CHUNK_SIZE)
+        ]
+
+    def _get_master_report_data(self, domain, data):
         """Get data for master report"""
+        employees = self.env['hr.employee'].search(domain)
         return {
             'doc_ids': employees.ids,
             'doc_model': 'hr.employee',
             'docs': employees,
+            'chunks': self._split_in_chunks(employees),
+            'as_of_date': data.get('as_of_date') and fields.Date.to_date(data['as_of_date']),
+            'as_of': self._get_as_of_columns(employees, data['as_of_date']) if data.get('as_of_date') else {},
             'report_type': 'master',
             'company': self.env.company,
             'print_date': fields.Datetime.now(),
         }
 
-    def _get_pension_report_data(self, employees, data):
+    def _get_as_of_columns(self, employees, as_of):
+        """Returns dict: {employee id: {rank, department, grade, status}} labels on as_of"""
+        snapshots = self.env['mda.hr.employee.snapshot']._read_as_of(employees.ids, as_of)
+        departments = {
+            department.id: department.name
+            for department in self.env['hr.department'].browse(
+                {values['department_id'] for values in snapshots.values() if values['department_id']})
+        }
+        grades = self._get_selection_labels('salary_grade_level')
+        statuses = self._get_selection_labels('employee_status')
+        return {
+            employee_id: {
+                'rank': values['rank'] or '',
+                'department': departments.get(values['department_id'], ''),
+                'grade': grades.get(values['salary_grade_level'], ''),
+                'status': statuses.get(values['employee_status'], ''),
+            }
+            for employee_id, values in snapshots.items()
+        }
+
+    def _get_pension_report_data(self, domain, data):
         """Get data for pension compliance report"""
-        permanent_staff = employees.filtered(lambda emp: emp.appointment_type == 'permanent')
+        Employee = self.env['hr.employee']
+        permanent_domain = domain + [('appointment_type', '=', 'permanent')]
         
-        with_pfa = permanent_staff.filtered(lambda emp: emp.pfa_name)
-        without_pfa = permanent_staff.filtered(lambda emp: not emp.pfa_name)
-        with_rsa = permanent_staff.filtered(lambda emp: emp.rsa_pin)
-        without_rsa = permanent_staff.filtered(lambda emp: not emp.rsa_pin)
+        # Counts come from SQL; only the non-compliant staff listed in the report are fetched
+        total_permanent = Employee.search_count(permanent_domain)
+        # Staff whose PFA Name is empty or not a recognised PFA ('NIL', typos) count as without PFA
+        without_pfa = Employee.search(permanent_domain + [('pfa_partner_id', '=', False)])
+        without_rsa = Employee.search(permanent_domain + [('rsa_pin', '=', False)])
         
         return {
-            'doc_ids': permanent_staff.ids,
+            'doc_ids': (without_pfa | without_rsa).ids,
             'doc_model': 'hr.employee',
-            'docs': permanent_staff,
+            'docs': without_pfa | without_rsa,
             'report_type': 'pension',
             'company': self.env.company,
             'print_date': fields.Datetime.now(),
-            'total_permanent': len(permanent_staff),
-            'with_pfa': len(with_pfa),
+            'total_permanent': total_permanent,
+            'with_pfa': total_permanent - len(without_pfa),
             'without_pfa': len(without_pfa),
-            'with_rsa': len(with_rsa),
+            'with_rsa': total_permanent - len(without_rsa),
             'without_rsa': len(without_rsa),
             'employees_without_pfa': without_pfa,
             'employees_without_rsa': without_rsa,
         }
 
-    def _get_retirement_report_data(self, employees, data):
+    def _get_retirement_report_data(self, domain, data):
         """Get data for retirement schedule report"""
         # Filter employees retiring in the next 5 years
         today = date.today()
         five_years_ahead = date(today.year + 5, 12, 31)
         
-        retiring_employees = employees.filtered(
-            lambda emp: emp.retirement_date and today <= emp.retirement_date <= five_years_ahead
-        ).sorted('retirement_date')
+        retiring_employees = self.env['hr.employee'].search(domain + [
+            ('retirement_date', '>=', today),
+            ('retirement_date', '<=', five_years_ahead),
+        ], order='retirement_date')
         
-        # Group by year
-        retirement_by_year = {}
-        for emp in retiring_employees:
-            year = emp.retirement_date.year
-            if year not in retirement_by_year:
-                retirement_by_year[year] = []
-            retirement_by_year[year].append(emp)
+        # Group by year (records are already sorted by retirement date)
+        retirement_by_year = retiring_employees.grouped(lambda emp: emp.retirement_date.year)
+        
+        # Long years are split so that no chunk exceeds REPORT_CHUNK_SIZE rows
+        retirement_chunks = [
+            {'year': year, 'total': len(employees), 'offset': offset, 'employees': chunk}
+            for year, employees in retirement_by_year.items()
+            for offset, chunk in self._split_in_chunks(employees)
+        ]
         
         return {
             'doc_ids': retiring_employees.ids,
@@ -158,66 +371,96 @@ class HrEmployeeReportPrint(models.AbstractModel):
             'company': self.env.company,
             'print_date': fields.Datetime.now(),
             'retirement_by_year': retirement_by_year,
+            'retirement_chunks': retirement_chunks,
         }
 
-    def _get_geographical_report_data(self, employees, data):
+    def _get_geographical_report_data(self, domain, data):
         """Get data for geographical distribution report"""
-        # Group by geopolitical zone
-        zone_distribution = {}
-        state_distribution = {}
+        zone_labels = self._get_selection_labels('geo_political_zone')
+        state_labels = self._get_selection_labels('state_of_origin')
         
-        for emp in employees:
-            # Zone distribution
-            zone = emp.geo_political_zone
-            if zone:
-                zone_display = dict(emp._fields['geo_political_zone'].selection)[zone]
-                if zone_display not in zone_distribution:
-                    zone_distribution[zone_display] = 0
-                zone_distribution[zone_display] += 1
-            
-            # State distribution
-            state = emp.state_of_origin
-            if state:
-                state_display = dict(emp._fields['state_of_origin'].selection)[state]
-                if state_display not in state_distribution:
-                    state_distribution[state_display] = 0
-                state_distribution[state_display] += 1
+        zone_distribution = {
+            zone_labels[zone]: count
+            for zone, count in self._count_by(domain, 'geo_political_zone').items()
+        }
+        state_distribution = {
+            state_labels[state]: count
+            for state, count in self._count_by(domain, 'state_of_origin').items()
+        }
         
         return {
-            'doc_ids': employees.ids,
+            'doc_ids': [],
             'doc_model': 'hr.employee',
-            'docs': employees,
+            'docs': self.env['hr.employee'],
             'report_type': 'geographical',
             'company': self.env.company,
             'print_date': fields.Datetime.now(),
             'zone_distribution': zone_distribution,
             'state_distribution': state_distribution,
-            'total_employees': len(employees),
+            'total_employees': self.env['hr.employee'].search_count(domain),
         }
 
-    def _get_qualification_report_data(self, employees, data):
-        """Get data for qualification analysis report."""
-        qualification_stats = {}
+    def _get_qualification_report_data(self, domain, data):
+        """Get data for qualification analysis report, bucketed by canonical qualification level."""
+        level_labels = self._get_selection_labels('qualification_level')
+        qualification_stats = {
+            level_labels[level]: {'count': count, 'employees': []}
+            for level, count in self._count_by(domain, 'qualification_level').items()
+        }
         
-        for emp in employees:
-            qual = emp.qualification
-            if qual:
-                # Since qualification is a Char field, use it directly as display value
-                if qual not in qualification_stats:
-                    qualification_stats[qual] = {
-                        'count': 0,
-                        'employees': []
-                    }
-                qualification_stats[qual]['count'] += 1
-                qualification_stats[qual]['employees'].append(emp)
+        # Detail rows carry only the columns printed in the breakdown tables
+        grade_labels = self._get_selection_labels('salary_grade_level')
+        rows = self.env['hr.employee'].search_read(
+            domain + [('qualification_level', '!=', False)],
+            ['qualification_level', 'file_number', 'name', 'department_id', 'rank', 'salary_grade_level'],
+            order='qualification_level, name',
+        )
+        for row in rows:
+            qualification_stats[level_labels[row['qualification_level']]]['employees'].append({
+                'file_number': row['file_number'] or '',
+                'name': row['name'] or '',
+                'department': row['department_id'][1] if row['department_id'] else '',
+                'rank': row['rank'] or '',
+                'salary_grade_level': grade_labels.get(row['salary_grade_level'], ''),
+            })
         
         return {
-            'doc_ids': employees.ids,
+            'doc_ids': [],
             'doc_model': 'hr.employee',
-            'docs': employees,
+            'docs': self.env['hr.employee'],
             'report_type': 'qualification',
             'company': self.env.company,
             'print_date': fields.Datetime.now(),
             'qualification_stats': qualification_stats,
-            'total_employees': len(employees),
-        }
\ No newline at end of file
+            'total_employees': self.env['hr.employee'].search_count(domain),
+        }
+
+
+class EmployeeMasterReport(models.AbstractModel):
+    _name = 'report.mda_hr.employee_master_report_template'
+    _inherit = 'mda_hr.employee.report.print'
+    _description = 'Employee Master Report'
+
+
+class PensionComplianceReport(models.AbstractModel):
+    _name = 'report.mda_hr.pension_compliance_report_template'
+    _inherit = 'mda_hr.employee.report.print'
+    _description = 'Pension Compliance Report'
+
+
+class RetirementScheduleReport(models.AbstractModel):
+    _name = 'report.mda_hr.retirement_schedule_report_template'
+    _inherit = 'mda_hr.employee.report.print'
+    _description = 'Retirement Schedule Report'
+
+
+class GeographicalDistributionReport(models.AbstractModel):
+    _name = 'report.mda_hr.geographical_distribution_report_template'
+    _inherit = 'mda_hr.employee.report.print'
+    _description = 'Geographical Distribution Report'
+
+
+class QualificationAnalysisReport(models.AbstractModel):
+    _name = 'report.mda_hr.qualification_analysis_report_template'
+    _inherit = 'mda_hr.employee.report.print'
+    _description = 'Qualification Analysis Report'
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from .hr_reports import REPORT_FILTERS
+from odoo.tools import config
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import lxml.html
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+_logger = logging.getLogger(__name__)
+
+# Reports whose articles (one per chunk of rows) are rendered by parallel wkhtmltopdf runs
+CHUNKED_REPORTS = {
+    'mda_hr.employee_master_report_template',
+    'mda_hr.retirement_schedule_report_template',
+}
+
+# Database connections of the pool left to requests and crons while chunks are rendered
+PDF_RENDER_CONNECTION_RESERVE = 8
+
+# Cursors held by chunk renderings of all concurrent prints of this process
+_render_cursors = threading.BoundedSemaphore(max(config['db_maxconn'] - PDF_RENDER_CONNECTION_RESERVE, 1))
+
+
+def _strip_page_numbers(html):
+    """Remove the wkhtmltopdf page counters from a header/footer; chunks number their pages locally."""
+    if not html:
+        return html
+    root = lxml.html.fromstring(html)
+    counters = root.xpath(
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' page ')"
+        " or contains(concat(' ', normalize-space(@class), ' '), ' topage ')]")
+    if not counters:
+        return html
+    for container in {counter.getparent() for counter in counters}:
+        container.drop_tree()
+    return lxml.html.tostring(root.getroottree(), encoding='unicode', doctype='<!DOCTYPE html>')
+
+
+def _stamp_page_numbers(pdf_content):
+    """Number the pages of the merged document as "Page x / y" in the bottom right corner."""
+    reader = PdfFileReader(io.BytesIO(pdf_content), strict=False)
+    total = len(reader.pages)
+    writer = PdfFileWriter()
+    for index, page in enumerate(reader.pages):
+        width = float(page.mediabox.width)
+        height = float(page.mediabox.height)
+        stamp = io.BytesIO()
+        pdf_canvas = canvas.Canvas(stamp, pagesize=(width, height))
+        pdf_canvas.setFont('Helvetica', 8)
+        pdf_canvas.setFillGray(0.45)
+        pdf_canvas.drawRightString(width - 15 * mm, 8 * mm, 'Page %s / %s' % (index + 1, total))
+        pdf_canvas.save()
+        page.merge_page(PdfFileReader(stamp, strict=False).pages[0])
+        writer.add_page(page)
+    result = io.BytesIO()
+    writer.write(result)
+    return result.getvalue()
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        report = self._get_report(report_ref)
+        if not report.report_name.startswith('mda_hr.'):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        ProfileLog = self.env['mda.hr.profile.log']
+        filters = ProfileLog._format_filters(data or {}, REPORT_FILTERS)
+        with ProfileLog._profile('report_render', report.report_name, filters=filters, rows=len(res_ids or [])):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+    def _get_pdf_render_workers(self):
+        """Number of concurrent wkhtmltopdf processes for chunked HR reports"""
+        workers = self.env['ir.config_parameter'].sudo().get_param('mda_hr.report_render_workers')
+        workers = int(workers or os.cpu_count() or 1)
+        # Each worker holds a cursor of the connection pool
+        return max(min(workers, config['db_maxconn'] - PDF_RENDER_CONNECTION_RESERVE), 1)
+
+    @api.model
+    def _run_wkhtmltopdf(self, bodies, report_ref=False, header=None, footer=None,
+                         landscape=False, specific_paperformat_args=None, set_viewport_size=False):
+        report = self._get_report(report_ref) if report_ref else self
+        workers = self._get_pdf_render_workers()
+        if (self.env.context.get('mda_hr_pdf_chunk') or report.report_name not in CHUNKED_REPORTS
+                or len(bodies) < 2 or workers < 2 or self.env.registry.in_test_mode()):
+            return super()._run_wkhtmltopdf(
+                bodies, report_ref=report_ref, header=header, footer=footer, landscape=landscape,
+                specific_paperformat_args=specific_paperformat_args, set_viewport_size=set_viewport_size)
+
+        # Each chunk gets its own wkhtmltopdf process, cursor and memory; the cursor is only
+        # used to read the paperformat, the rendering itself happens outside of Python.
+        header = _strip_page_numbers(header)
+        footer = _strip_page_numbers(footer)
+        uid, context = self.env.uid, dict(self.env.context, mda_hr_pdf_chunk=True)
+
+        def render_chunk(body):
+            with _render_cursors, self.env.registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                return env['ir.actions.report']._run_wkhtmltopdf(
+                    [body], report_ref=report.id, header=header, footer=footer, landscape=landscape,
+                    specific_paperformat_args=specific_paperformat_args, set_viewport_size=set_viewport_size)
+
+        _logger.info("Rendering %s in %d chunks with %d workers", report.report_name, len(bodies), workers)
+        with ThreadPoolExecutor(max_workers=min(workers, len(bodies))) as executor:
+            chunk_pdfs = list(executor.map(render_chunk, bodies))
+
+        writer = PdfFileWriter()
+        for chunk_pdf in chunk_pdfs:
+            for page in PdfFileReader(io.BytesIO(chunk_pdf), strict=False).pages:
+                writer.add_page(page)
+        merged = io.BytesIO()
+        writer.write(merged)
+        return _stamp_page_numbers(merged.getvalue())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, SUPERUSER_ID
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Defaults of the mda_hr.profile_* system parameters
+PROFILE_SAMPLE_RATE = 0.05
+PROFILE_SLOW_SECONDS = 2.0
+PROFILE_RETENTION_DAYS = 30
+
+PROFILE_CATEGORIES = [
+    ('report_data', 'Report Data'),
+    ('report_print', 'Report Print'),
+    ('report_render', 'PDF Rendering'),
+    ('compute', 'Stored Compute'),
+    ('screening', 'Promotion Screening'),
+    ('promotion', 'Promotion Implementation'),
+]
+
+# Operations in progress in this thread, innermost last; a parent subtracts its children's time
+_profile_stack = threading.local()
+
+
+def profiled_compute(method):
+    """Profile a compute method as a 'compute' operation over the records it computes"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.env['mda.hr.profile.log']._profile('compute', method.__name__, rows=len(self)):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class HrProfileLog(models.Model):
+    """Sampled timing of a report, compute, screening or promotion run"""
+    _name = 'mda.hr.profile.log'
+    _description = 'HR Performance Log'
+    _order = 'create_date desc, id desc'
+    _log_access = False
+
+    create_date = fields.Datetime(string='Date', readonly=True, index=True)
+    category = fields.Selection(PROFILE_CATEGORIES, string='Category', required=True, readonly=True, index=True)
+    operation = fields.Char(string='Operation', required=True, readonly=True, index=True)
+    filters = fields.Char(string='Filters', readonly=True, help='Filter combination of the report or run')
+    user_id = fields.Many2one('res.users', string='User', readonly=True, ondelete='set null')
+    rows = fields.Integer(string='Rows', readonly=True, aggregator='max',
+                          help='Records read, computed or written by the operation')
+
+    # Groups show the slowest run
+    duration = fields.Float(string='Duration (s)', digits=(12, 3), readonly=True, aggregator='max')
+    query_count = fields.Integer(string='Queries', readonly=True, aggregator='max')
+    query_time = fields.Float(string='SQL Time (s)', digits=(12, 3), readonly=True, aggregator='max',
+                              help='Only measured in HTTP request and cron threads')
+    render_time = fields.Float(string='Render Time (s)', digits=(12, 3), readonly=True, aggregator='max',
+                               help='PDF rendering, outside of the report data queries and computes')
+    python_time = fields.Float(string='Python Time (s)', digits=(12, 3), readonly=True, aggregator='max')
+
+    @api.model
+    def _get_profile_settings(self):
+        """Returns tuple: (sample rate, slow operation threshold in seconds)"""
+        params = self.env['ir.config_parameter'].sudo()
+        sample_rate = float(params.get_param('mda_hr.profile_sample_rate', PROFILE_SAMPLE_RATE))
+        slow_seconds = float(params.get_param('mda_hr.profile_slow_seconds', PROFILE_SLOW_SECONDS))
+        return sample_rate, slow_seconds
+
+    @api.model
+    @contextmanager
+    def _profile(self, category, operation, filters=None, rows=None):
+        """
+        Time the block. Every slow run and a sample of the others are logged once the
+        transaction commits; the yielded dict can set 'rows' once they are known.
+        """
+        if not self.env.registry.ready:
+            # Module loading: the log table may not be committed yet
+            yield {}
+            return
+        stack = _profile_stack.__dict__.setdefault('stack', [])
+        probe = {'rows': rows, 'children': 0.0}
+        stack.append(probe)
+        thread = threading.current_thread()
+        cr = self.env.cr
+        queries, query_time = cr.sql_log_count, getattr(thread, 'query_time', None)
+        started = time.perf_counter()
+        try:
+            yield probe
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1]['children'] += duration
+            sample_rate, slow_seconds = self._get_profile_settings()
+            if duration >= slow_seconds or random.random() < sample_rate:
+                sql_time = getattr(thread, 'query_time', None)
+                sql_time = sql_time - query_time if sql_time is not None and query_time is not None else 0.0
+                render_time = duration - probe['children'] if category == 'report_render' else 0.0
+                self._buffer_entry({
+                    'create_date': fields.Datetime.now(),
+                    'category': category,
+                    'operation': operation,
+                    'filters': filters or False,
+                    'user_id': self.env.uid,
+                    'rows': probe['rows'] or 0,
+                    'duration': duration,
+                    'query_count': cr.sql_log_count - queries,
+                    'query_time': sql_time,
+                    'render_time': render_time,
+                    'python_time': max(duration - sql_time - render_time, 0.0),
+                })
+
+    @api.model
+    def _buffer_entry(self, vals):
+        """Keep the entry until the transaction commits, then write the batch with its own cursor"""
+        postcommit = self.env.cr.postcommit
+        entries = postcommit.data.setdefault('mda_hr.profile_entries', [])
+        if not entries:
+            registry = self.env.registry
+
+            def write_entries():
+                try:
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, SUPERUSER_ID, {})
+                        env['mda.hr.profile.log'].create(entries)
+                except Exception:
+                    _logger.warning("Could not write %s performance log entries", len(entries), exc_info=True)
+            postcommit.add(write_entries)
+        entries.append(vals)
+
+    @api.model
+    def _format_filters(self, data, names):
+        """'state_filter=lagos, employee_status=active' for the filters set in data, in a stable order"""
+        return ', '.join('%s=%s' % (name, data[name]) for name in names if data.get(name)) or False
+
+    @api.model
+    def _cron_purge(self):
+        """Drop the entries older than the retention period"""
+        params = self.env['ir.config_parameter'].sudo()
+        days = int(params.get_param('mda_hr.profile_retention_days', PROFILE_RETENTION_DAYS))
+        self.env.cr.execute(
+            "DELETE FROM mda_hr_profile_log WHERE create_date < %s",
+            [fields.Datetime.now() - timedelta(days=days)])
+        _logger.info("Performance log: %s entries older than %s days removed", self.env.cr.rowcount, days)
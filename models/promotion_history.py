@@ -1,15 +1,27 @@
 # mda_hr/models/promotion_history.py
 from odoo import models, fields, api, _
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+from odoo.tools.sql import create_index
+import logging
+from psycopg2 import IntegrityError
 from ..constants import SALARY_GRADE_LEVELS
 
+_logger = logging.getLogger(__name__)
+
+ELIGIBILITY_RECOMPUTE_BATCH_SIZE = 1000
+
+# Rejections of a single promotion. Concurrency errors (serialization failures, deadlocks, lock
+# timeouts) are not caught: they abort the whole transaction so Odoo retries it.
+PROMOTION_REJECTIONS = (UserError, ValidationError, IntegrityError)
+
 
 class HrPromotionHistory(models.Model):
     _name = 'mda.hr.promotion.history'
     _description = 'Employee Promotion History'
     _order = 'effective_date desc'
 
-    employee_id = fields.Many2one('hr.employee', string='Employee', required=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, index=True)
     old_salary_grade_level = fields.Selection(
         related='employee_id.salary_grade_level', string='Old Grade Level', readonly=True)
     old_rank = fields.Char(string='Old Rank', related='employee_id.rank', readonly=True)
@@ -25,51 +37,293 @@ class HrPromotionHistory(models.Model):
         ('draft', 'Draft'),
         ('approved', 'Approved'),
         ('implemented', 'Implemented')
-    ], default='draft')
+    ], default='draft', index=True)
 
-    # Eligibility tracking
+    # Eligibility tracking (stored; the maturity period is refreshed by the date boundary cron)
     promotion_eligibility_status = fields.Text(
         string='Eligibility Status',
-        compute='_compute_promotion_eligibility_status',
+        compute='_compute_promotion_eligibility',
+        store=True,
         help='Shows promotion eligibility check results'
     )
     is_promotion_eligible = fields.Boolean(
         string='Is Eligible',
-        compute='_compute_is_promotion_eligible',
+        compute='_compute_promotion_eligibility',
+        store=True,
+        index=True,
         help='True if employee meets all promotion requirements'
     )
 
-    @api.depends('employee_id')
-    def _compute_promotion_eligibility_status(self):
-        """Check and display promotion eligibility status."""
+    def init(self):
+        super().init()
+        # Changed-since pages of the roll API
+        create_index(self.env.cr, 'mda_hr_promotion_history_write_date_idx', self._table, ['write_date', 'id'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Employees' next promotion due dates move with their histories, and their KPI counters with them
+        employees = self.env['hr.employee'].browse(
+            {vals['employee_id'] for vals in vals_list if vals.get('employee_id')})
+        counted_before = employees._get_kpi_keys()
+        records = super().create(vals_list)
+        self.env['mda.hr.workforce.kpi']._apply_deltas(counted_before, employees._get_kpi_keys())
+        self.env['mda.promotion.report']._schedule_refresh()
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return records
+
+    def write(self, vals):
+        counted_before = None
+        if any(field in vals for field in ('employee_id', 'effective_date')):
+            employees = self.employee_id
+            if vals.get('employee_id'):
+                employees |= employees.browse(vals['employee_id'])
+            counted_before = employees._get_kpi_keys()
+        result = super().write(vals)
+        if counted_before is not None:
+            self.env['mda.hr.workforce.kpi']._apply_deltas(counted_before, employees._get_kpi_keys())
+        self.env['mda.promotion.report']._schedule_refresh()
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return result
+
+    def unlink(self):
+        employees = self.employee_id
+        counted_before = employees._get_kpi_keys()
+        result = super().unlink()
+        self.env['mda.hr.workforce.kpi']._apply_deltas(counted_before, employees.exists()._get_kpi_keys())
+        self.env['mda.promotion.report']._schedule_refresh()
+        self.env['mda_hr.employee.report.print']._bump_report_version()
+        return result
+
+    # Vacancy counters are not a dependency: the establishment recomputes open promotions itself
+    @api.depends(
+        'employee_id',
+        'employee_id.is_confirmed',
+        'employee_id.date_confirmed',
+        'employee_id.salary_grade_level',
+        'employee_id.has_disciplinary_case',
+        'employee_id.passed_promotion_exam',
+        'employee_id.department_id',
+    )
+    def _compute_promotion_eligibility(self):
+        """Check promotion eligibility once per distinct employee for both fields."""
+        eligibility = self.employee_id._get_promotion_eligibility_map()
         for record in self:
             if record.employee_id:
-                is_eligible, reasons = record.employee_id.check_promotion_eligibility()
+                is_eligible, reasons = eligibility[record.employee_id.id]
+                record.is_promotion_eligible = is_eligible
                 if is_eligible:
                     record.promotion_eligibility_status = '✓ Employee is eligible for promotion'
                 else:
                     record.promotion_eligibility_status = 'Employee is NOT eligible:\n' + '\n'.join(f'• {reason}' for reason in reasons)
             else:
+                record.is_promotion_eligible = False
                 record.promotion_eligibility_status = 'Please select an employee'
 
-    @api.depends('employee_id')
-    def _compute_is_promotion_eligible(self):
-        """Check if employee is eligible for promotion."""
-        for record in self:
-            if record.employee_id:
-                is_eligible, _ = record.employee_id.check_promotion_eligibility()
-                record.is_promotion_eligible = is_eligible
-            else:
-                record.is_promotion_eligible = False
+    def _recompute_promotion_eligibility(self, batch_size=ELIGIBILITY_RECOMPUTE_BATCH_SIZE):
+        """Recompute the stored eligibility of these records, batch by batch"""
+        fnames = ['is_promotion_eligible', 'promotion_eligibility_status']
+        for batch_ids in split_every(batch_size, self.ids):
+            records = self.browse(batch_ids)
+            for fname in fnames:
+                self.env.add_to_compute(self._fields[fname], records)
+            records.flush_recordset(fnames)
 
     @api.constrains('employee_id', 'state')
     def _check_promotion_eligibility_on_approve(self):
         """Validate promotion eligibility when moving to approved state."""
+        if self.env.context.get('mda_hr_eligibility_checked'):
+            return
+        approved = self.filtered(lambda record: record.state == 'approved')
+        eligibility = approved.employee_id._get_promotion_eligibility_map()
+        for record in approved:
+            is_eligible, reasons = eligibility[record.employee_id.id]
+            if not is_eligible:
+                raise UserError(
+                    _('Cannot approve promotion. Employee is not eligible:\n\n') + 
+                    '\n'.join(f'• {reason}' for reason in reasons)
+                )
+
+    @api.constrains('employee_id', 'new_salary_grade_level', 'state')
+    def _check_new_grade_level(self):
+        """Open promotions go to the grade level whose vacancy the eligibility checks"""
+        mismatches = self.filtered(lambda record: record.state != 'implemented')._get_grade_mismatches()
+        if mismatches:
+            raise ValidationError(next(iter(mismatches.values())))
+
+    def _get_grade_mismatches(self):
+        """
+        Find the promotions not to the next grade level of the employee's salary structure (grades
+        without a known next grade level are not checked).
+        Returns dict: {record: reason}
+        """
+        next_grades = self.env['mda.hr.grade.level']._get_next_grade_codes(
+            {grade for grade in self.employee_id.mapped('salary_grade_level') if grade})
+        labels = dict(SALARY_GRADE_LEVELS)
+        mismatches = {}
         for record in self:
-            if record.state == 'approved':
-                is_eligible, reasons = record.employee_id.check_promotion_eligibility()
-                if not is_eligible:
-                    raise UserError(
-                        _('Cannot approve promotion. Employee is not eligible:\n\n') + 
-                        '\n'.join(f'• {reason}' for reason in reasons)
-                    )
\ No newline at end of file
+            next_grade = next_grades.get(record.employee_id.salary_grade_level)
+            if next_grade and record.new_salary_grade_level != next_grade:
+                mismatches[record] = _(
+                    "%(employee)s can only be promoted to %(next_grade)s, the next grade level: the vacancy "
+                    "is checked on that grade, not on %(grade)s.",
+                    employee=record.employee_id.name, next_grade=labels.get(next_grade, next_grade),
+                    grade=labels.get(record.new_salary_grade_level, record.new_salary_grade_level),
+                )
+        return mismatches
+
+    def _approve_promotions(self):
+        """
+        Approve the draft promotions whose employee is eligible, with one eligibility check
+        and one write. Returns tuple: (approved records, failures [(record, reason)])
+        """
+        drafts = self.filtered(lambda record: record.state == 'draft')
+        failures = [(record, _('Only draft promotions can be approved.')) for record in self - drafts]
+        eligibility = drafts.employee_id._get_promotion_eligibility_map()
+        mismatches = drafts._get_grade_mismatches()
+        approved = self.browse()
+        for record in drafts:
+            is_eligible, reasons = eligibility[record.employee_id.id]
+            if record in mismatches:
+                failures.append((record, mismatches[record]))
+            elif is_eligible:
+                approved |= record
+            else:
+                failures.append((record, _('Employee is not eligible: %s', '; '.join(reasons))))
+        approved.with_context(mda_hr_eligibility_checked=True).write({
+            'state': 'approved',
+            'approval_date': fields.Date.context_today(self),
+            'approved_by': self.env.uid,
+        })
+        return approved, failures
+
+    def _implement_promotions(self):
+        """
+        Apply approved promotions to their employees: employees moving to the same grade, rank
+        and date are written together, then all promotions are marked implemented at once.
+        Each promotion takes up a vacant post of the establishment; once a grade is full the
+        remaining promotions to it fail.
+        Returns tuple: (implemented records, failures [(record, reason)])
+        """
+        with self.env['mda.hr.profile.log']._profile('promotion', 'implement', rows=len(self)):
+            return self._implement_promotion_groups()
+
+    def _implement_promotion_groups(self):
+        failures = []
+        groups = {}
+        seen_employees = set()
+        for record in self:
+            if record.state != 'approved':
+                failures.append((record, _('Promotion must be approved before implementation.')))
+            elif record.employee_id.id in seen_employees:
+                failures.append((record, _('Another promotion of %s is implemented in this batch.', record.employee_id.name)))
+            else:
+                seen_employees.add(record.employee_id.id)
+                key = (record.new_salary_grade_level, record.new_rank, record.effective_date)
+                groups.setdefault(key, self.browse())
+                groups[key] |= record
+
+        implemented = self.browse()
+        for (grade, rank, effective_date), records in groups.items():
+            vals = {
+                'salary_grade_level': grade,
+                'rank': rank,
+                'date_present_appointment': effective_date,
+            }
+            employees = records.employee_id.with_context(
+                mda_hr_establishment_strict=True, mda_hr_snapshot_date=effective_date)
+            try:
+                with self.env.cr.savepoint():
+                    employees.write(vals)
+                implemented |= records
+                continue
+            except PROMOTION_REJECTIONS:
+                _logger.info("Promotion group of %s employees failed, retrying one by one", len(records))
+            for record in records:
+                try:
+                    with self.env.cr.savepoint():
+                        employees.browse(record.employee_id.id).write(vals)
+                    implemented |= record
+                except PROMOTION_REJECTIONS as e:
+                    failures.append((record, str(e)))
+
+        implemented.write({'state': 'implemented'})
+        return implemented, failures
+
+
+class HrPromotionBatch(models.TransientModel):
+    """Wizard approving and/or implementing a board-approved batch of promotions"""
+    _name = 'mda.hr.promotion.batch'
+    _description = 'Promotion Batch Processing'
+
+    promotion_ids = fields.Many2many(
+        'mda.hr.promotion.history', string='Promotions', required=True,
+        default=lambda self: self.env.context.get('active_ids', [])
+        if self.env.context.get('active_model') == 'mda.hr.promotion.history' else [])
+    operation = fields.Selection([
+        ('approve', 'Approve'),
+        ('implement', 'Implement'),
+        ('both', 'Approve and Implement'),
+    ], string='Operation', required=True, default='both')
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+
+    approved_count = fields.Integer(string='Approved', readonly=True)
+    implemented_count = fields.Integer(string='Implemented', readonly=True)
+    failed_count = fields.Integer(string='Failed', readonly=True)
+    failure_log = fields.Text(string='Failures', readonly=True)
+    failed_promotion_ids = fields.Many2many(
+        'mda.hr.promotion.history', 'mda_hr_promotion_batch_failed_rel', string='Failed Promotions', readonly=True)
+
+    def action_process(self):
+        """Run the selected operation on all promotions and show the summary"""
+        self.ensure_one()
+        promotions = self.promotion_ids
+        approved = implemented = promotions.browse()
+        failures = []
+        if self.operation in ('approve', 'both'):
+            to_approve = promotions
+            if self.operation == 'both':
+                # Promotions approved earlier go straight to implementation
+                to_approve = promotions.filtered(lambda record: record.state == 'draft')
+            approved, failures = to_approve._approve_promotions()
+            if self.operation == 'both':
+                # Refused promotions are reported once; the others go on to implementation
+                failed = promotions.browse([record.id for record, _reason in failures])
+                promotions -= failed
+        if self.operation in ('implement', 'both'):
+            implemented, implement_failures = promotions._implement_promotions()
+            failures += implement_failures
+
+        self.write({
+            'state': 'done',
+            'approved_count': len(approved),
+            'implemented_count': len(implemented),
+            'failed_count': len(failures),
+            'failure_log': '\n'.join(
+                _("%(employee)s (%(rank)s): %(reason)s",
+                  employee=record.employee_id.name, rank=record.new_rank, reason=reason)
+                for record, reason in failures
+            ),
+            'failed_promotion_ids': [(6, 0, [record.id for record, _reason in failures])],
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_view_failed(self):
+        """Open the promotions that could not be processed"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Failed Promotions'),
+            'res_model': 'mda.hr.promotion.history',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.failed_promotion_ids.ids)],
+        }
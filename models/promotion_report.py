@@ -1,6 +1,22 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, SUPERUSER_ID
+from odoo.tools import SQL
+import logging
 from datetime import datetime, timedelta
+from .grade_level import DEFAULT_MATURITY_YEARS
+from .establishment import VACANCY_AVAILABLE_SQL
+
+_logger = logging.getLogger(__name__)
+
+# Maturity period met since confirmation, against the grade level joined as "gl"
+# (same rule as HrEmployee.is_maturity_period_met)
+MATURITY_MET_SQL = """(
+    emp.date_confirmed IS NOT NULL AND
+    (CURRENT_DATE - emp.date_confirmed) / 365.25 >= CASE
+        WHEN emp.salary_grade_level IS NULL THEN 0
+        ELSE COALESCE(gl.maturity_years, %d)
+    END
+)""" % DEFAULT_MATURITY_YEARS
 
 
 class PromotionReport(models.Model):
@@ -8,6 +24,7 @@ class PromotionReport(models.Model):
     _description = 'Promotion Analysis Report'
     _auto = False
     _rec_name = 'employee_name'
+    _order = 'employee_name, promotion_effective_date desc, id'
 
     # Employee Information
     employee_id = fields.Many2one('hr.employee', string='Employee', readonly=True)
@@ -42,11 +59,27 @@ class PromotionReport(models.Model):
         ('implemented', 'Implemented')
     ], string='Promotion Status', readonly=True)
 
-    @property
-    def _table_query(self):
-        return """(
+    def init(self):
+        """(Re)create the materialised view and its indexes; the unique id index allows concurrent refreshes"""
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL("""
+            CREATE MATERIALIZED VIEW %s AS %s
+        """, SQL.identifier(self._table), SQL(self._get_report_query())))
+        for column in ('id', 'employee_id', 'department_id', 'current_grade', 'promotion_state'):
+            self.env.cr.execute(SQL(
+                "CREATE %s INDEX %s ON %s (%s)",
+                SQL('UNIQUE') if column == 'id' else SQL(),
+                SQL.identifier('%s_%s_idx' % (self._table, column)),
+                SQL.identifier(self._table),
+                SQL.identifier(column),
+            ))
+
+    def _get_report_query(self):
+        """One row per promotion history record, plus one per active employee without history.
+        History rows get even ids and employee-only rows odd ids, so ids never collide."""
+        return """
             SELECT
-                emp.id * 1000 + COALESCE(ph.id, 0) as id,
+                CASE WHEN ph.id IS NULL THEN emp.id * 2 + 1 ELSE ph.id * 2 END as id,
                 emp.id as employee_id,
                 emp.name as employee_name,
                 emp.file_number,
@@ -63,17 +96,19 @@ class PromotionReport(models.Model):
                 emp.date_confirmed,
                 emp.has_disciplinary_case,
                 emp.passed_promotion_exam,
-                emp.promotion_vacancy_available as promotion_vacancy,
+                %(vacancy)s as promotion_vacancy,
                 CASE 
                     WHEN emp.is_confirmed AND 
+                         %(maturity_met)s AND
                          NOT emp.has_disciplinary_case AND 
                          emp.passed_promotion_exam AND 
-                         emp.promotion_vacancy_available 
+                         %(vacancy)s
                     THEN TRUE 
                     ELSE FALSE 
                 END as is_eligible,
                 COALESCE(ph.state, 'draft') as promotion_state
             FROM hr_employee emp
+            LEFT JOIN mda_hr_grade_level gl ON gl.code = emp.salary_grade_level
             LEFT JOIN mda_hr_promotion_history ph ON emp.id = ph.employee_id
             LEFT JOIN (
                 SELECT employee_id, COUNT(*) as promotion_count
@@ -82,8 +117,43 @@ class PromotionReport(models.Model):
                 GROUP BY employee_id
             ) prom ON emp.id = prom.employee_id
             WHERE emp.active = TRUE
-            ORDER BY emp.name, ph.effective_date DESC
-        )"""
+        """ % {'maturity_met': MATURITY_MET_SQL, 'vacancy': VACANCY_AVAILABLE_SQL}
+
+    @api.model
+    def _refresh_view(self):
+        """Refresh the materialised data without blocking readers"""
+        self.env['hr.employee'].flush_model()
+        self.env['mda.hr.promotion.history'].flush_model()
+        self.env['mda.hr.establishment'].flush_model()
+        self.env.cr.execute(SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY %s", SQL.identifier(self._table)))
+        self.invalidate_model()
+
+    @api.model
+    def _schedule_refresh(self):
+        """
+        Ask the refresh cron to run as soon as possible, once per transaction: the trigger is
+        added after the commit, however many writes asked for it.
+        """
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get('mda_hr.promotion_report_refresh'):
+            return
+        postcommit.data['mda_hr.promotion_report_refresh'] = True
+        registry = self.env.registry
+
+        def trigger_refresh():
+            try:
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    cron = env.ref('mda_hr.ir_cron_refresh_promotion_report', raise_if_not_found=False)
+                    if cron:
+                        cron._trigger()
+            except Exception:
+                _logger.warning("Could not trigger the promotion report refresh", exc_info=True)
+        postcommit.add(trigger_refresh)
+
+    @api.model
+    def _cron_refresh(self):
+        self._refresh_view()
 
 
 class PromotionEligibilityReport(models.Model):
@@ -122,28 +192,28 @@ class PromotionEligibilityReport(models.Model):
                 emp.salary_grade_level as current_grade,
                 emp.rank as current_rank,
                 CASE WHEN emp.is_confirmed THEN TRUE ELSE FALSE END as confirmed_eligible,
-                CASE 
-                    WHEN emp.is_confirmed THEN TRUE
-                    ELSE FALSE 
-                END as maturity_eligible,
+                CASE WHEN %(maturity_met)s THEN TRUE ELSE FALSE END as maturity_eligible,
                 CASE WHEN NOT emp.has_disciplinary_case THEN TRUE ELSE FALSE END as discipline_check,
                 CASE WHEN emp.passed_promotion_exam THEN TRUE ELSE FALSE END as exam_check,
-                CASE WHEN emp.promotion_vacancy_available THEN TRUE ELSE FALSE END as vacancy_check,
+                CASE WHEN %(vacancy)s THEN TRUE ELSE FALSE END as vacancy_check,
                 CASE 
                     WHEN emp.is_confirmed AND 
+                         %(maturity_met)s AND
                          NOT emp.has_disciplinary_case AND 
                          emp.passed_promotion_exam AND 
-                         emp.promotion_vacancy_available 
+                         %(vacancy)s
                     THEN TRUE 
                     ELSE FALSE 
                 END as overall_eligible,
                 ROUND(
                     ((CASE WHEN emp.is_confirmed THEN 1 ELSE 0 END +
+                      CASE WHEN %(maturity_met)s THEN 1 ELSE 0 END +
                       CASE WHEN NOT emp.has_disciplinary_case THEN 1 ELSE 0 END +
                       CASE WHEN emp.passed_promotion_exam THEN 1 ELSE 0 END +
-                      CASE WHEN emp.promotion_vacancy_available THEN 1 ELSE 0 END) / 4.0 * 100), 2
+                      CASE WHEN %(vacancy)s THEN 1 ELSE 0 END) / 5.0 * 100), 2
                 ) as eligibility_percentage
             FROM hr_employee emp
+            LEFT JOIN mda_hr_grade_level gl ON gl.code = emp.salary_grade_level
             WHERE emp.active = TRUE
             ORDER BY emp.name
-        )"""
+        )""" % {'maturity_met': MATURITY_MET_SQL, 'vacancy': VACANCY_AVAILABLE_SQL}
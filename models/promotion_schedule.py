@@ -1,7 +1,8 @@
 # mda_hr/models/promotion_schedule.py
-from odoo import models, fields, api
+from odoo import models, fields, api, Command
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
+import time
 
 
 class HrPromotionSchedule(models.Model):
@@ -11,6 +12,9 @@ class HrPromotionSchedule(models.Model):
     name = fields.Char(string='Promotion Name', required=True)
     promotion_year = fields.Integer(string='Promotion Year', required=True)
     min_years_in_grade = fields.Integer(string='Minimum Years in Grade', default=3)
+    grade_level_ids = fields.Many2many(
+        'mda.hr.grade.level', string='Grade Levels',
+        help='Only screen employees on these grade levels (all grade levels when empty)')
 
     exam_date = fields.Date(string='Examination Date')
     interview_start = fields.Date(string='Interview Start')
@@ -19,6 +23,8 @@ class HrPromotionSchedule(models.Model):
     effective_date = fields.Date(string='Effective Date of Promotion')
 
     eligible_employee_ids = fields.Many2many('hr.employee', string='Eligible Employees')
+    eligible_count = fields.Integer(string='Eligible', compute='_compute_eligible_count')
+    screening_ids = fields.One2many('mda.hr.promotion.screening', 'schedule_id', string='Screenings')
 
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -28,18 +34,83 @@ class HrPromotionSchedule(models.Model):
         ('closed', 'Closed')
     ], default='draft')
 
-    @api.model
-    def compute_eligible_employees(self):
-        """Compute eligible employees based on time-in-grade."""
-        today = date.today()
-        eligible = self.env['hr.employee'].search([])
-        eligible_ids = []
-        
-        for emp in eligible:
-            if emp.date_present_appointment:
-                # Use relativedelta for accurate year-based calculation
-                cutoff_date = today - relativedelta(years=self.min_years_in_grade)
-                if emp.date_present_appointment <= cutoff_date:
-                    eligible_ids.append(emp.id)
-        
-        self.eligible_employee_ids = [(6, 0, eligible_ids)]
+    @api.depends('eligible_employee_ids')
+    def _compute_eligible_count(self):
+        for schedule in self:
+            schedule.eligible_count = len(schedule.eligible_employee_ids)
+
+    def _get_screening_domain(self, today=None):
+        """Employees in post long enough in their grade: active, confirmed, on a screened grade."""
+        self.ensure_one()
+        cutoff_date = (today or date.today()) - relativedelta(years=self.min_years_in_grade)
+        domain = [
+            ('employee_status', '=', 'active'),
+            ('is_confirmed', '=', True),
+            ('date_present_appointment', '<=', cutoff_date),
+        ]
+        if self.grade_level_ids:
+            domain.append(('salary_grade_level', 'in', self.grade_level_ids.mapped('code')))
+        return domain
+
+    def compute_eligible_employees(self, incremental=True):
+        """
+        Screen employees for each schedule with one query. In incremental mode only the links
+        that changed are added/removed; every run is logged with who entered and left the pool.
+        """
+        Employee = self.env['hr.employee']
+        ProfileLog = self.env['mda.hr.profile.log']
+        for schedule in self:
+            filters = 'min_years_in_grade=%s, grades=%s, incremental=%s' % (
+                schedule.min_years_in_grade, ','.join(schedule.grade_level_ids.mapped('code')) or 'all', incremental)
+            with ProfileLog._profile('screening', schedule.name, filters=filters) as probe:
+                started = time.monotonic()
+                eligible_ids = set(Employee.search(schedule._get_screening_domain(), order='id').ids)
+                current_ids = set(schedule.eligible_employee_ids.ids)
+                entered_ids = eligible_ids - current_ids
+                left_ids = current_ids - eligible_ids
+
+                if incremental:
+                    if entered_ids or left_ids:
+                        schedule.eligible_employee_ids = (
+                            [Command.link(emp_id) for emp_id in entered_ids]
+                            + [Command.unlink(emp_id) for emp_id in left_ids]
+                        )
+                else:
+                    schedule.eligible_employee_ids = [Command.set(sorted(eligible_ids))]
+
+                self.env['mda.hr.promotion.screening'].create({
+                    'schedule_id': schedule.id,
+                    'eligible_count': len(eligible_ids),
+                    'entered_employee_ids': [Command.set(sorted(entered_ids))],
+                    'left_employee_ids': [Command.set(sorted(left_ids))],
+                    'duration': time.monotonic() - started,
+                })
+                probe['rows'] = len(eligible_ids)
+        return True
+
+    def action_screen_employees(self):
+        self.compute_eligible_employees()
+
+
+class HrPromotionScreening(models.Model):
+    """One screening run of a promotion schedule"""
+    _name = 'mda.hr.promotion.screening'
+    _description = 'Promotion Screening'
+    _order = 'create_date desc, id desc'
+
+    schedule_id = fields.Many2one('mda.hr.promotion.schedule', string='Promotion Schedule',
+                                  required=True, ondelete='cascade', index=True)
+    eligible_count = fields.Integer(string='Eligible', readonly=True)
+    entered_employee_ids = fields.Many2many(
+        'hr.employee', 'mda_hr_promotion_screening_entered_rel', string='Entered the Pool', readonly=True)
+    left_employee_ids = fields.Many2many(
+        'hr.employee', 'mda_hr_promotion_screening_left_rel', string='Left the Pool', readonly=True)
+    entered_count = fields.Integer(string='Entered', compute='_compute_counts')
+    left_count = fields.Integer(string='Left', compute='_compute_counts')
+    duration = fields.Float(string='Duration (s)', readonly=True)
+
+    @api.depends('entered_employee_ids', 'left_employee_ids')
+    def _compute_counts(self):
+        for screening in self:
+            screening.entered_count = len(screening.entered_employee_ids)
+            screening.left_count = len(screening.left_employee_ids)
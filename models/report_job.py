@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from odoo import models, fields, api, _
+from ..constants import NIGERIAN_STATES
+from .hr_reports import REPORT_TYPES, REPORT_ACTIONS, EMPLOYEE_STATUS_FILTER
+
+_logger = logging.getLogger(__name__)
+
+REPORT_JOB_BATCH_SIZE = 5
+
+
+class HrReportJob(models.Model):
+    """Queued HR report rendered by cron and delivered as an attachment"""
+    _name = 'mda.hr.report.job'
+    _description = 'HR Report Job'
+    _inherit = ['mail.thread']
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Job', compute='_compute_name', store=True)
+    report_type = fields.Selection(REPORT_TYPES, string='Report Type', required=True, readonly=True)
+
+    # Filters, as selected in the report wizard
+    date_from = fields.Date(string='From Date', readonly=True)
+    date_to = fields.Date(string='To Date', readonly=True)
+    state_filter = fields.Selection(NIGERIAN_STATES, string='Filter by State', readonly=True)
+    employee_status = fields.Selection(EMPLOYEE_STATUS_FILTER, string='Filter by Status', readonly=True)
+    as_of_date = fields.Date(string='As of Date', readonly=True)
+
+    user_id = fields.Many2one('res.users', string='Requested By', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='queued', required=True, readonly=True, index=True, tracking=True)
+
+    date_started = fields.Datetime(string='Started', readonly=True)
+    date_finished = fields.Datetime(string='Finished', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True)
+    row_count = fields.Integer(string='Employees', readonly=True,
+                               help='Employees matching the report filters')
+    attachment_id = fields.Many2one('ir.attachment', string='Report File', readonly=True)
+    error_message = fields.Text(string='Error', readonly=True)
+
+    @api.depends('report_type', 'create_date')
+    def _compute_name(self):
+        labels = dict(REPORT_TYPES)
+        for job in self:
+            job.name = '%s (%s)' % (labels.get(job.report_type, ''), fields.Datetime.to_string(job.create_date) or _('new'))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        self.env.ref('mda_hr.ir_cron_process_report_jobs')._trigger()
+        return jobs
+
+    def _get_report_data(self):
+        """Filters passed to the report engine, same shape as the wizard's"""
+        self.ensure_one()
+        return {
+            'report_type': self.report_type,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'state_filter': self.state_filter,
+            'employee_status': self.employee_status,
+            'as_of_date': self.as_of_date,
+        }
+
+    @api.model
+    def _cron_process_jobs(self, limit=REPORT_JOB_BATCH_SIZE):
+        """
+        Render queued report jobs. Each job is locked on its own and rendered before the commit
+        that releases it, so concurrent workers skip each other's jobs.
+        """
+        processed = 0
+        while processed < limit:
+            self.env.cr.execute("""
+                SELECT id FROM mda_hr_report_job
+                 WHERE state = 'queued'
+              ORDER BY create_date
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                return
+            self.browse(row[0])._run()
+            processed += 1
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        self.env.ref('mda_hr.ir_cron_process_report_jobs')._trigger()
+
+    def _run(self):
+        """Render the PDF as the requesting user, attach it and notify them."""
+        self.ensure_one()
+        self.write({'state': 'running', 'date_started': fields.Datetime.now(), 'error_message': False})
+        started = time.monotonic()
+        data = self._get_report_data()
+        try:
+            with self.env.cr.savepoint():
+                report_env = self.with_user(self.user_id).env
+                domain = report_env['mda_hr.employee.report.print']._get_employee_domain(data)
+                row_count = report_env['hr.employee'].search_count(domain)
+                report = self.env.ref(REPORT_ACTIONS[self.report_type])
+                pdf, _report_format = report_env['ir.actions.report']._render_qweb_pdf(report, data=data)
+        except Exception as e:
+            _logger.exception("Report job %s failed", self.id)
+            self.write({
+                'state': 'failed',
+                'date_finished': fields.Datetime.now(),
+                'duration': time.monotonic() - started,
+                'error_message': str(e),
+            })
+            self.message_post(
+                body=_('The report could not be generated: %s', e),
+                partner_ids=self.user_id.partner_id.ids,
+            )
+            return
+
+        attachment = self.env['ir.attachment'].create({
+            'name': '%s.pdf' % self.name,
+            'raw': pdf,
+            'mimetype': 'application/pdf',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        self.write({
+            'state': 'done',
+            'date_finished': fields.Datetime.now(),
+            'duration': time.monotonic() - started,
+            'row_count': row_count,
+            'attachment_id': attachment.id,
+        })
+        self.message_post(
+            body=_('Your report is ready.'),
+            attachment_ids=attachment.ids,
+            partner_ids=self.user_id.partner_id.ids,
+        )
+
+    def action_retry(self):
+        """Put failed jobs back in the queue"""
+        self.filtered(lambda job: job.state == 'failed').write({'state': 'queued'})
+        self.env.ref('mda_hr.ir_cron_process_report_jobs')._trigger()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, _
+from odoo.exceptions import AccessError
+from odoo.tools import SQL
+import base64
+import datetime
+import hashlib
+import json
+
+# Rows per page, unless the consumer asks for fewer (or more, up to the maximum)
+API_PAGE_SIZE = 1000
+API_MAX_PAGE_SIZE = 5000
+
+# Default of mda_hr.api_changed_since_window (minutes): write dates are stamped when the writing
+# transaction starts, so rows committed after a page was served can be older than its last row
+API_CHANGED_SINCE_WINDOW = 60
+
+# Wizard-style employee filters accepted as query parameters
+API_EMPLOYEE_FILTERS = ('date_from', 'date_to', 'state_filter', 'employee_status', 'as_of_date')
+
+DEPARTMENT_NAME_SQL = "COALESCE(dep.name->>%(lang)s, dep.name->>'en_US')"
+PFA_NAME_SQL = "(SELECT pfa.name FROM res_partner pfa WHERE pfa.id = emp.pfa_partner_id)"
+
+# Exposed fields per resource: {API field: SQL expression}. Selection fields return their keys.
+EMPLOYEE_API_FIELDS = {
+    'id': 'emp.id',
+    'file_number': 'emp.file_number',
+    'ippis': 'emp.ippis',
+    'name': 'emp.name',
+    'surname': 'emp.surname',
+    'first_name': 'emp.first_name',
+    'middle_name': 'emp.middle_name',
+    'gender': 'emp.gender',
+    'birthday': 'emp.birthday',
+    'department_id': 'emp.department_id',
+    'department': DEPARTMENT_NAME_SQL,
+    'rank': 'emp.rank',
+    'salary_grade_level': 'emp.salary_grade_level',
+    'salary_structure': 'emp.salary_structure',
+    'appointment_type': 'emp.appointment_type',
+    'date_first_appointment': 'emp.date_first_appointment',
+    'date_present_appointment': 'emp.date_present_appointment',
+    'date_confirmed': 'emp.date_confirmed',
+    'is_confirmed': 'emp.is_confirmed',
+    'retirement_date': 'emp.retirement_date',
+    'rsa_pin': 'emp.rsa_pin',
+    'pfa_name': 'emp.pfa_name',
+    'pfa': PFA_NAME_SQL,
+    'state_of_origin': 'emp.state_of_origin',
+    'lga': 'emp.lga',
+    'geo_political_zone': 'emp.geo_political_zone',
+    'employee_status': 'emp.employee_status',
+    'qualification': 'emp.qualification',
+    'qualification_level': 'emp.qualification_level',
+    'active': 'emp.active',
+    'write_date': 'emp.write_date',
+}
+
+PROMOTION_API_FIELDS = {
+    'id': 'rec.id',
+    'employee_id': 'rec.employee_id',
+    'file_number': 'emp.file_number',
+    'ippis': 'emp.ippis',
+    'new_salary_grade_level': 'rec.new_salary_grade_level',
+    'new_rank': 'rec.new_rank',
+    'effective_date': 'rec.effective_date',
+    'approval_date': 'rec.approval_date',
+    'state': 'rec.state',
+    'is_promotion_eligible': 'rec.is_promotion_eligible',
+    'write_date': 'rec.write_date',
+}
+
+# Resource: (model, FROM clause, row alias, exposed fields, domain prefix of the employee filters)
+API_RESOURCES = {
+    'employees': (
+        'hr.employee',
+        "hr_employee emp LEFT JOIN hr_department dep ON dep.id = emp.department_id",
+        'emp', EMPLOYEE_API_FIELDS, '',
+    ),
+    'promotions': (
+        'mda.hr.promotion.history',
+        "mda_hr_promotion_history rec JOIN hr_employee emp ON emp.id = rec.employee_id",
+        'rec', PROMOTION_API_FIELDS, 'employee_id.',
+    ),
+}
+
+
+class HrRollApi(models.AbstractModel):
+    """Keyset-paginated JSON pages of the nominal roll and promotion history"""
+    _name = 'mda.hr.roll.api'
+    _description = 'Nominal Roll API'
+
+    @api.model
+    def _encode_cursor(self, row_id, write_date=None):
+        key = [row_id] if write_date is None else [row_id, write_date.isoformat()]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @api.model
+    def _decode_cursor(self, cursor):
+        """Returns tuple: (last id, last write date or None); raises ValueError on a malformed cursor"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            row_id = int(key[0])
+            write_date = datetime.datetime.fromisoformat(key[1]) if len(key) > 1 else None
+        except (TypeError, ValueError, IndexError, UnicodeError):
+            raise ValueError(_("Invalid cursor."))
+        return row_id, write_date
+
+    @api.model
+    def _get_api_domain(self, resource, params):
+        """Employee filters (as in the report wizard) on the resource's model, plus its own filters"""
+        prefix = API_RESOURCES[resource][4]
+        employee_filters = {key: params[key] for key in API_EMPLOYEE_FILTERS if params.get(key)}
+        domain = [
+            (prefix + fname, operator, value)
+            for fname, operator, value in self.env['mda_hr.employee.report.print']._get_employee_domain(employee_filters)
+        ]
+        if params.get('department_id'):
+            domain.append((prefix + 'department_id', '=', int(params['department_id'])))
+        if resource == 'promotions' and params.get('state'):
+            domain.append(('state', '=', params['state']))
+        return domain
+
+    @api.model
+    def get_page(self, resource, params):
+        """
+        One page of `resource` as a JSON-serialisable dict: records, next_cursor (None on the last
+        page) and, in changed-since mode, last_write_date to pass as changed_since next time.
+        Changed-since pages start a safety window before changed_since, so records already sent
+        can come again: consumers upsert them by id.
+
+        params: fields (comma separated), limit, cursor, changed_since (ISO datetime, UTC) and
+        the employee filters. Pages follow the id order; in changed-since mode they follow
+        (write_date, id) and include archived employees so deactivations are seen. Filtering on
+        as_of_date also includes them: staff in service then may have been archived since.
+        """
+        if not self.env.user.has_group('hr.group_hr_user'):
+            raise AccessError(_("Only HR officers can read the nominal roll."))
+        model_name, from_clause, alias, api_fields, _prefix = API_RESOURCES[resource]
+
+        names = [name.strip() for name in (params.get('fields') or '').split(',') if name.strip()] or list(api_fields)
+        unknown = set(names) - set(api_fields)
+        if unknown:
+            raise ValueError(_("Unknown fields: %s", ', '.join(sorted(unknown))))
+        # The keyset columns are always returned, the consumer's cursor is built from them
+        changed_since = params.get('changed_since')
+        keys = ['id', 'write_date'] if changed_since else ['id']
+        names = keys + [name for name in names if name not in keys]
+        limit = min(max(int(params.get('limit') or API_PAGE_SIZE), 1), API_MAX_PAGE_SIZE)
+
+        model = self.env[model_name].with_context(active_test=not (changed_since or params.get('as_of_date')))
+        model.flush_model()
+        self.env['hr.employee'].flush_model()
+        id_column, write_date_column = SQL.identifier(alias, 'id'), SQL.identifier(alias, 'write_date')
+
+        # Record rules and filters apply through the _search subquery. The keyset conditions are
+        # plain SQL: write dates keep their microseconds and (write_date, id) uses its index.
+        query = model._search(self._get_api_domain(resource, params))
+        conditions = [SQL('%s IN %s', id_column, query.subselect())]
+        if changed_since:
+            conditions.append(SQL('%s > %s', write_date_column,
+                                  self._parse_changed_since(changed_since) - self._get_changed_since_window()))
+        if params.get('cursor'):
+            last_id, last_write_date = self._decode_cursor(params['cursor'])
+            if changed_since and last_write_date:
+                conditions.append(SQL('(%s, %s) > (%s, %s)', write_date_column, id_column, last_write_date, last_id))
+            else:
+                conditions.append(SQL('%s > %s', id_column, last_id))
+
+        columns = SQL(', ').join(
+            SQL('%s AS %s', SQL(api_fields[name], lang=self.env.lang or 'en_US')
+                if api_fields[name] == DEPARTMENT_NAME_SQL else SQL(api_fields[name]), SQL.identifier(name))
+            for name in names
+        )
+        # One more row than the page tells if there is a next one
+        self.env.cr.execute(SQL(
+            "SELECT %s FROM %s WHERE %s ORDER BY %s LIMIT %s",
+            columns, SQL(from_clause), SQL(' AND ').join(conditions),
+            SQL(', ').join(SQL.identifier(alias, key) for key in reversed(keys)), limit + 1,
+        ))
+        records = self.env.cr.dictfetchall()
+
+        page = {'records': records[:limit], 'next_cursor': None}
+        if len(records) > limit:
+            last = records[limit - 1]
+            page['next_cursor'] = self._encode_cursor(last['id'], last['write_date'] if changed_since else None)
+        if changed_since:
+            page['last_write_date'] = (
+                page['records'][-1]['write_date'] if page['records'] else self._parse_changed_since(changed_since))
+        return page
+
+    @api.model
+    def _get_changed_since_window(self):
+        """Longest transaction expected to write the roll, re-read before each changed_since"""
+        minutes = self.env['ir.config_parameter'].sudo().get_param(
+            'mda_hr.api_changed_since_window', API_CHANGED_SINCE_WINDOW)
+        return datetime.timedelta(minutes=int(minutes))
+
+    @api.model
+    def _parse_changed_since(self, value):
+        """ISO date/datetime (naive values are UTC) as the naive UTC datetime stored by Odoo"""
+        try:
+            moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(_("Invalid changed_since date: %s", value))
+        if moment.tzinfo:
+            moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return moment
+
+    @api.model
+    def _dump_page(self, page):
+        """Returns tuple: (JSON body, digest of the body, used as its ETag)"""
+        body = json.dumps(page, default=self._json_default, separators=(',', ':'))
+        return body, hashlib.sha1(body.encode()).hexdigest()
+
+    @api.model
+    def _json_default(self, value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        raise TypeError(repr(value))
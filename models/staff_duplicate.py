@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+import logging
+import time
+from ..duplicates import DUPLICATE_THRESHOLD, DuplicateIndex, find_duplicates, make_person
+
+_logger = logging.getLogger(__name__)
+
+# hr.employee columns read into duplicate detection records, in make_person order
+DUPLICATE_FIELDS = ['ippis', 'rsa_pin', 'birthday', 'surname', 'first_name', 'middle_name', 'name']
+
+
+class HrStaffDuplicate(models.Model):
+    """Suspected duplicate pair of employees, found by the roll audit or on import"""
+    _name = 'mda.hr.staff.duplicate'
+    _description = 'Suspected Duplicate Staff'
+    _order = 'state, score desc, id desc'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, ondelete='cascade', index=True)
+    duplicate_id = fields.Many2one('hr.employee', string='Possible Duplicate', required=True, ondelete='cascade', index=True)
+    score = fields.Float(string='Score', digits=(3, 2), readonly=True)
+    reasons = fields.Char(string='Reasons', readonly=True)
+    source = fields.Selection([
+        ('audit', 'Roll Audit'),
+        ('import', 'Import'),
+    ], string='Found By', readonly=True, default='audit')
+
+    state = fields.Selection([
+        ('open', 'To Review'),
+        ('confirmed', 'Confirmed Duplicate'),
+        ('dismissed', 'Not a Duplicate'),
+    ], default='open', required=True, index=True)
+
+    employee_file_number = fields.Char(related='employee_id.file_number', string='File Number')
+    duplicate_file_number = fields.Char(related='duplicate_id.file_number', string='Duplicate File Number')
+
+    _sql_constraints = [
+        ('pair_unique', 'unique(employee_id, duplicate_id)', 'This pair of employees is already listed.'),
+        ('pair_ordered', 'CHECK(employee_id < duplicate_id)', 'A pair lists the older employee record first.'),
+    ]
+
+    def action_confirm(self):
+        self.write({'state': 'confirmed'})
+
+    def action_dismiss(self):
+        self.write({'state': 'dismissed'})
+
+    def action_reopen(self):
+        self.write({'state': 'open'})
+
+    @api.model
+    def _read_people(self, employee_ids=None):
+        """Duplicate detection records of the active roll (or of employee_ids), in one query"""
+        Employee = self.env['hr.employee']
+        Employee.flush_model(DUPLICATE_FIELDS + ['active'])
+        query = "SELECT id, %s FROM hr_employee WHERE active" % ', '.join(DUPLICATE_FIELDS)
+        params = []
+        if employee_ids is not None:
+            query += " AND id = ANY(%s)"
+            params.append(list(employee_ids))
+        self.env.cr.execute(query + " ORDER BY id", params)
+        return [make_person(*row) for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _load_duplicate_index(self):
+        """Blocking index of the active roll, built once per import"""
+        index = DuplicateIndex()
+        for person in self._read_people():
+            index.add(person)
+        return index
+
+    @api.model
+    def _check_new_employees(self, employees, index, threshold=DUPLICATE_THRESHOLD):
+        """
+        Match freshly imported employees against the roll index (and each other), then add them
+        to the index. Returns the number of suspected pairs recorded.
+        """
+        pairs = []
+        for person in self._read_people(employees.ids):
+            for other_id, score, reasons in index.match(person, threshold):
+                pairs.append((min(person['id'], other_id), max(person['id'], other_id), score, reasons))
+            index.add(person)
+        return len(self._store_pairs(pairs, 'import'))
+
+    @api.model
+    def _store_pairs(self, pairs, source):
+        """Create the pairs not listed yet and refresh the score of the open ones. Returns new pairs"""
+        if not pairs:
+            return self.browse()
+        self.flush_model(['employee_id', 'duplicate_id', 'state'])
+        self.env.cr.execute("""
+            SELECT id, employee_id, duplicate_id, state
+              FROM mda_hr_staff_duplicate
+             WHERE (employee_id, duplicate_id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+        """, [[pair[0] for pair in pairs], [pair[1] for pair in pairs]])
+        existing = {(employee_id, duplicate_id): (pair_id, state)
+                    for pair_id, employee_id, duplicate_id, state in self.env.cr.fetchall()}
+
+        vals_list = []
+        for employee_id, duplicate_id, score, reasons in pairs:
+            pair_id, state = existing.get((employee_id, duplicate_id), (None, None))
+            vals = {'score': score, 'reasons': '; '.join(reasons)}
+            if pair_id is None:
+                vals_list.append(dict(vals, employee_id=employee_id, duplicate_id=duplicate_id, source=source))
+            elif state == 'open':
+                # Reviewed pairs keep their decision
+                self.browse(pair_id).write(vals)
+        return self.create(vals_list)
+
+    @api.model
+    def _cron_audit_duplicates(self, threshold=DUPLICATE_THRESHOLD):
+        """
+        Scan the whole active roll for suspected duplicates. Open pairs no longer suspected
+        (corrected records) are removed; reviewed pairs are kept.
+        """
+        started = time.monotonic()
+        pairs = find_duplicates(self._read_people(), threshold)
+        created = self._store_pairs(pairs, 'audit')
+
+        found = {(employee_id, duplicate_id) for employee_id, duplicate_id, _score, _reasons in pairs}
+        stale = self.search([('state', '=', 'open')]).filtered(
+            lambda pair: (pair.employee_id.id, pair.duplicate_id.id) not in found)
+        stale.unlink()
+        _logger.info("Duplicate staff audit: %s suspected pairs (%s new, %s cleared) in %.1fs",
+                     len(pairs), len(created), len(stale), time.monotonic() - started)
+        return len(pairs)
+
+    def action_run_audit(self):
+        self._cron_audit_duplicates()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+from odoo.tools import SQL
+import logging
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+_logger = logging.getLogger(__name__)
+
+# Counted over the staff in service (active record, Active status):
+# (dimension, hr.employee field, (to_char format, strftime format) for date fields)
+KPI_DIMENSIONS = [
+    ('zone', 'geo_political_zone', None),
+    ('state', 'state_of_origin', None),
+    ('grade', 'salary_grade_level', None),
+    ('appointment_type', 'appointment_type', None),
+    ('promotion_due', 'next_promotion_due', ('YYYY', '%Y')),
+    ('retirement', 'retirement_date', ('YYYY-MM', '%Y-%m')),
+]
+# Counted over all active employee records
+KPI_STATUS_DIMENSION = ('status', 'employee_status')
+
+# Employee fields the counters are read from, or computed from
+KPI_FIELDS = [
+    'active', 'company_id', 'employee_status', 'geo_political_zone', 'state_of_origin',
+    'salary_grade_level', 'appointment_type', 'next_promotion_due', 'retirement_date',
+    'date_present_appointment', 'birthday', 'qualification',
+]
+
+KPI_DIMENSION_SELECTION = [
+    ('status', 'Employee Status'),
+    ('zone', 'Geopolitical Zone'),
+    ('state', 'State of Origin'),
+    ('grade', 'Grade Level'),
+    ('appointment_type', 'Appointment Type'),
+    ('promotion_due', 'Promotion Due (Year)'),
+    ('retirement', 'Retirement (Month)'),
+]
+
+
+class HrWorkforceKpi(models.Model):
+    """Employee counter per company, dimension and value, maintained by deltas on every change"""
+    _name = 'mda.hr.workforce.kpi'
+    _description = 'Workforce KPI Counter'
+    _order = 'company_id, dimension, key'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    dimension = fields.Selection(KPI_DIMENSION_SELECTION, string='Dimension', required=True, readonly=True)
+    key = fields.Char(string='Value', readonly=True)
+    count = fields.Integer(string='Employees', readonly=True, aggregator='sum')
+
+    _sql_constraints = [
+        ('company_dimension_key_unique', 'unique(company_id, dimension, key)',
+         'A KPI counter is kept once per company, dimension and value.'),
+    ]
+
+    @api.model
+    def _apply_deltas(self, counts_before, counts_after):
+        """
+        Add the difference between two {(company id, dimension, key): employees} counters to the
+        table in one statement. Rows are upserted in key order so concurrent transactions lock
+        them in the same order.
+        """
+        deltas = sorted(
+            (key, counts_after.get(key, 0) - counts_before.get(key, 0))
+            for key in set(counts_before) | set(counts_after)
+        )
+        deltas = [(key, delta) for key, delta in deltas if delta]
+        if not deltas:
+            return
+        self.env.cr.execute("""
+            INSERT INTO mda_hr_workforce_kpi (company_id, dimension, key, count)
+            SELECT * FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::int[])
+            ON CONFLICT (company_id, dimension, key)
+            DO UPDATE SET count = mda_hr_workforce_kpi.count + EXCLUDED.count
+        """, [
+            [key[0] for key, _delta in deltas],
+            [key[1] for key, _delta in deltas],
+            [key[2] for key, _delta in deltas],
+            [delta for _key, delta in deltas],
+        ])
+        self.invalidate_model(['count'])
+
+    def _get_recount_query(self):
+        """Counters recounted from hr_employee, in the shape of the table"""
+        dimensions = [SQL(
+            "SELECT company_id, %s AS dimension, COALESCE(%s::varchar, '') AS key, COUNT(*) AS count"
+            " FROM hr_employee WHERE active GROUP BY 1, 3",
+            KPI_STATUS_DIMENSION[0], SQL.identifier(KPI_STATUS_DIMENSION[1]),
+        )]
+        for dimension, fname, date_formats in KPI_DIMENSIONS:
+            value = SQL('to_char(%s, %s)', SQL.identifier(fname), date_formats[0]) if date_formats \
+                else SQL('%s::varchar', SQL.identifier(fname))
+            dimensions.append(SQL(
+                "SELECT company_id, %s, COALESCE(%s, ''), COUNT(*)"
+                " FROM hr_employee WHERE active AND employee_status = 'active' GROUP BY 1, 3",
+                dimension, value,
+            ))
+        return SQL(' UNION ALL ').join(dimensions)
+
+    @api.model
+    def _reconcile(self):
+        """
+        Recount every counter from the employees and correct the ones that drifted (SQL updates,
+        upgrades). Returns the number of counters corrected.
+        """
+        self.env['hr.employee'].flush_model(KPI_FIELDS)
+        self.env.cr.execute(SQL("""
+            WITH recount AS (%s),
+            corrected AS (
+                INSERT INTO mda_hr_workforce_kpi (company_id, dimension, key, count)
+                SELECT company_id, dimension, key, count FROM recount
+                ON CONFLICT (company_id, dimension, key)
+                DO UPDATE SET count = EXCLUDED.count
+                WHERE mda_hr_workforce_kpi.count <> EXCLUDED.count
+                RETURNING 1
+            ),
+            cleared AS (
+                UPDATE mda_hr_workforce_kpi kpi
+                   SET count = 0
+                 WHERE kpi.count <> 0
+                   AND NOT EXISTS (
+                        SELECT 1 FROM recount
+                         WHERE recount.company_id = kpi.company_id
+                           AND recount.dimension = kpi.dimension
+                           AND recount.key = kpi.key
+                   )
+             RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM corrected) + (SELECT COUNT(*) FROM cleared)
+        """, self._get_recount_query()))
+        corrected = self.env.cr.fetchone()[0]
+        self.invalidate_model(['count'])
+        return corrected
+
+    @api.model
+    def _cron_reconcile(self):
+        """
+        Reconcile in a transaction of its own that locks the counters before reading anything:
+        changes committed meanwhile are counted, the ones still running apply their deltas after.
+        """
+        with self.env.registry.cursor() as cr:
+            cr.execute("LOCK TABLE mda_hr_workforce_kpi IN EXCLUSIVE MODE")
+            corrected = self.with_env(self.env(cr=cr))._reconcile()
+        if corrected:
+            _logger.warning("Workforce KPI reconciliation corrected %s counters", corrected)
+        else:
+            _logger.info("Workforce KPI reconciliation: all counters match")
+        return corrected
+
+    @api.model
+    def get_dashboard_data(self, today=None):
+        """
+        Workforce figures of the current companies from the counters, in one query.
+        Returns dict: headcount, per-dimension lists of {key, label, count}, promotions due
+        this year and overdue, retirements in the next 12 months
+        """
+        if not self.env.user.has_group('hr.group_hr_user'):
+            raise AccessError(_("Only HR officers can view the workforce dashboard."))
+        today = today or date.today()
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT dimension, key, SUM(count)
+              FROM mda_hr_workforce_kpi
+             WHERE company_id = ANY(%s) AND count <> 0
+          GROUP BY dimension, key
+        """, [self.env.companies.ids])
+        counts = {}
+        for dimension, key, count in self.env.cr.fetchall():
+            counts.setdefault(dimension, {})[key] = count
+
+        Employee = self.env['hr.employee']
+        data = {}
+        for dimension, fname in [KPI_STATUS_DIMENSION] + [(dimension, fname) for dimension, fname, date_formats
+                                                          in KPI_DIMENSIONS if not date_formats]:
+            selection = Employee._fields[fname]._description_selection(self.env)
+            values = counts.get(dimension, {})
+            data[dimension] = [
+                {'key': key, 'label': label, 'count': values[key]}
+                for key, label in selection + [('', _('Not Set'))] if values.get(key)
+            ]
+
+        promotion_due = counts.get('promotion_due', {})
+        this_year = str(today.year)
+        months = {(today + relativedelta(months=offset)).strftime('%Y-%m') for offset in range(12)}
+        data.update({
+            'headcount': sum(entry['count'] for entry in data['zone']),
+            'promotion_due_this_year': promotion_due.get(this_year, 0),
+            'promotion_overdue': sum(count for year, count in promotion_due.items() if year and year < this_year),
+            'retiring_next_12_months': sum(
+                count for month, count in counts.get('retirement', {}).items() if month in months),
+            'date': today,
+        })
+        return data
+
+
+class HrWorkforceDashboard(models.TransientModel):
+    """Workforce KPI dashboard, rendered from the counters"""
+    _name = 'mda.hr.workforce.dashboard'
+    _description = 'Workforce Dashboard'
+
+    summary = fields.Html(string='Summary', compute='_compute_summary', sanitize=False)
+
+    def _compute_summary(self):
+        values = self.env['mda.hr.workforce.kpi'].get_dashboard_data()
+        html = self.env['ir.qweb']._render('mda_hr.workforce_dashboard_summary', {'kpis': values})
+        for dashboard in self:
+            dashboard.summary = html
+
+    def action_refresh(self):
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
+
+    def action_reconcile(self):
+        if not self.env.user.has_group('hr.group_hr_manager'):
+            raise AccessError(_("Only HR managers can reconcile the workforce counters."))
+        self.env['mda.hr.workforce.kpi']._cron_reconcile()
+        return self.action_refresh()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+import logging
+import time
+from datetime import date
+from ..projection import project_workforce, year_fraction
+from .grade_level import DEFAULT_MATURITY_YEARS
+
+_logger = logging.getLogger(__name__)
+
+
+class HrWorkforceProjection(models.Model):
+    """Grade x year projection of promotions and retirements over the active roll"""
+    _name = 'mda.hr.workforce.projection'
+    _description = 'Workforce Projection'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Projection', required=True, default=lambda self: _('Workforce Projection'))
+    start_year = fields.Integer(string='Start Year', required=True, default=lambda self: date.today().year,
+                                help='Staff on the roll today are projected from the year after this one')
+    years = fields.Integer(string='Years', required=True, default=10)
+    promote = fields.Boolean(string='Assume Promotions', default=True,
+                             help='Promote staff to the next grade of their salary structure as soon as they are due')
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft', readonly=True)
+    employee_count = fields.Integer(string='Employees Projected', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True)
+    line_ids = fields.One2many('mda.hr.workforce.projection.line', 'projection_id', string='Lines', readonly=True)
+
+    _sql_constraints = [
+        ('years_positive', 'CHECK(years > 0 AND years <= 30)', 'Projections cover 1 to 30 years.'),
+    ]
+
+    def action_run(self):
+        """Load the roll once, simulate it and replace the projection lines"""
+        for projection in self:
+            started = time.monotonic()
+            columns, grades, grade_codes = projection._load_roll()
+            try:
+                rows = project_workforce(columns, grades, projection.start_year, projection.years, projection.promote)
+            except ValueError as e:
+                raise UserError(str(e))
+
+            grade_level_ids = {
+                record.code: record.id
+                for record in self.env['mda.hr.grade.level'].search([('code', 'in', grade_codes)])
+            }
+            projection.line_ids.unlink()
+            self.env['mda.hr.workforce.projection.line'].create([{
+                'projection_id': projection.id,
+                'year': year,
+                'grade_code': grade_codes[grade_index],
+                'grade_level_id': grade_level_ids.get(grade_codes[grade_index]),
+                'headcount': headcount,
+                'promotions_due': promotions_due,
+                'promotions': promotions,
+                'retirements': retirements,
+            } for year, grade_index, headcount, promotions_due, promotions, retirements in rows])
+            projection.write({
+                'state': 'done',
+                'employee_count': len(columns['grade']),
+                'duration': time.monotonic() - started,
+            })
+            _logger.info("Workforce projection %s: %s employees x %s years in %.2fs",
+                         projection.id, len(columns['grade']), projection.years, projection.duration)
+        return True
+
+    def _load_roll(self):
+        """
+        Read the active roll in one query into columns for project_workforce.
+        Returns tuple: (columns, grades [(maturity_years, next_grade_index)], grade codes by index)
+        """
+        GradeLevel = self.env['mda.hr.grade.level']
+        grade_records = GradeLevel.search([])
+        grade_codes = grade_records.mapped('code')
+        grade_index = {code: index for index, code in enumerate(grade_codes)}
+
+        # Next grade: the lowest higher level of the same salary structure
+        levels_by_structure = {}
+        for record in grade_records:
+            levels_by_structure.setdefault(record.salary_structure, []).append((record.level, record.code))
+        next_codes = {}
+        for levels in levels_by_structure.values():
+            levels.sort()
+            for (level, code), (next_level, next_code) in zip(levels, levels[1:]):
+                if next_level > level:
+                    next_codes[code] = next_code
+        grades = [
+            (record.maturity_years, grade_index[next_codes[record.code]] if record.code in next_codes else -1)
+            for record in grade_records
+        ]
+
+        Employee = self.env['hr.employee']
+        Employee.flush_model(['salary_grade_level', 'date_present_appointment', 'date_confirmed', 'retirement_date'])
+        query = Employee._search([('employee_status', '=', 'active')])
+        self.env.cr.execute(SQL("""
+            SELECT salary_grade_level, date_present_appointment, date_confirmed, retirement_date
+              FROM hr_employee
+             WHERE id IN %s AND salary_grade_level IS NOT NULL
+        """, query.subselect()))
+
+        columns = {'grade': [], 'last_promotion': [], 'confirmed': [], 'retirement': []}
+        for grade, appointed, confirmed, retirement in self.env.cr.fetchall():
+            if grade not in grade_index:
+                # Grade missing from the grade level table: default maturity, no promotion
+                grade_index[grade] = len(grade_codes)
+                grade_codes.append(grade)
+                grades.append((DEFAULT_MATURITY_YEARS, -1))
+            columns['grade'].append(grade_index[grade])
+            columns['last_promotion'].append(year_fraction(appointed))
+            columns['confirmed'].append(year_fraction(confirmed))
+            columns['retirement'].append(year_fraction(retirement))
+        return columns, grades, grade_codes
+
+    def action_view_lines(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': 'mda.hr.workforce.projection.line',
+            'view_mode': 'pivot,graph,list',
+            'domain': [('projection_id', '=', self.id)],
+        }
+
+
+class HrWorkforceProjectionLine(models.Model):
+    _name = 'mda.hr.workforce.projection.line'
+    _description = 'Workforce Projection Line'
+    _order = 'projection_id, year, grade_level_id'
+
+    projection_id = fields.Many2one('mda.hr.workforce.projection', string='Projection',
+                                    required=True, ondelete='cascade', index=True)
+    year = fields.Integer(string='Year', required=True)
+    grade_code = fields.Char(string='Grade Code')
+    grade_level_id = fields.Many2one('mda.hr.grade.level', string='Grade Level')
+    headcount = fields.Integer(string='Headcount', aggregator='sum', help='Staff in the grade on 1 January')
+    promotions_due = fields.Integer(string='Promotions Due', aggregator='sum')
+    promotions = fields.Integer(string='Promotions', aggregator='sum')
+    retirements = fields.Integer(string='Retirements', aggregator='sum')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Workforce projection engine
+Steps the whole roll year by year on columnar (numpy) arrays: retirements, promotion maturity
+and promotions to the next grade of the same salary structure
+"""
+
+# Years taken to confirm staff from their present appointment (see HrEmployee._compute_is_confirmed)
+CONFIRMATION_YEARS = 2
+
+
+def year_fraction(value):
+    """Date as a fractional year (2024-07-02 -> ~2024.5), None when not set."""
+    if not value:
+        return None
+    return value.year + (value.timetuple().tm_yday - 1) / 365.25
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("The numpy library is required to run workforce projections.")
+    return numpy
+
+
+def project_workforce(columns, grades, start_year, years, promote=True):
+    """
+    Project the roll over `years` years after start_year.
+
+    columns: dict of equal-length sequences, one item per employee:
+        grade: index into grades, last_promotion / confirmed / retirement: fractional years or None
+    grades: list of (maturity_years, next_grade_index or -1)
+
+    Returns list of (year, grade_index, headcount, promotions_due, promotions, retirements),
+    counted at the grade held at the start of the year, for the grades with any staff.
+    """
+    np = _import_numpy()
+
+    def as_years(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    grade = np.asarray(columns['grade'], dtype=np.int64)
+    last_promotion = as_years(columns['last_promotion'])
+    confirmed = as_years(columns['confirmed'])
+    retirement = as_years(columns['retirement'])
+    maturity = np.array([maturity_years for maturity_years, _next in grades], dtype=np.float64)
+    next_grade = np.array([next_index for _maturity, next_index in grades], dtype=np.int64)
+    n_grades = len(grades)
+
+    # Staff confirmed without a confirmation date are confirmed two years after appointment
+    confirmed = np.where(np.isnan(confirmed), last_promotion + CONFIRMATION_YEARS, confirmed)
+    # Staff due to retire by the end of the start year are gone by 1 January of the first projected
+    # year: they are not counted in service, nor as that year's retirements. NaN retirement dates
+    # never compare, so staff without one stay in service
+    in_service = ~(retirement < start_year + 1)
+
+    rows = []
+    for year in range(start_year + 1, start_year + years + 1):
+        headcount = np.bincount(grade[in_service], minlength=n_grades)
+
+        # Anyone due by the end of the year retires
+        retiring = in_service & (retirement < year + 1)
+        retirements = np.bincount(grade[retiring], minlength=n_grades)
+        in_service &= ~retiring
+
+        due_at = np.fmax(last_promotion + maturity[grade], confirmed)
+        due = in_service & (due_at < year + 1)
+        promotions_due = np.bincount(grade[due], minlength=n_grades)
+
+        promoted = due & (next_grade[grade] >= 0) if promote else np.zeros_like(due)
+        promotions = np.bincount(grade[promoted], minlength=n_grades)
+        # Backlogged staff are promoted on 1 January at the earliest
+        last_promotion = np.where(promoted, np.fmax(due_at, year), last_promotion)
+        grade = np.where(promoted, next_grade[grade], grade)
+
+        for index in np.flatnonzero(headcount):
+            rows.append((
+                year, int(index), int(headcount[index]), int(promotions_due[index]),
+                int(promotions[index]), int(retirements[index]),
+            ))
+    return rows
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Report payload cache
+Size-bounded LRU of computed report datasets, shared by the threads of a worker process
+"""
+
+import threading
+from collections import OrderedDict
+
+# Report payloads kept per worker process
+REPORT_CACHE_SIZE = 32
+
+
+class ReportCache:
+    """Thread-safe LRU mapping with hit/miss counters."""
+
+    def __init__(self, size=REPORT_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for key, or None."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Returns dict: size, entries, hits, misses, hit_ratio"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': self.size,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+report_cache = ReportCache()
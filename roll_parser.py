@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Nominal roll parsing helpers
+Streaming readers and cell normalisers shared by the bulk import and sync paths
+"""
+
+import csv
+import hashlib
+import io
+import json
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
+
+from .constants import (
+    SALARY_GRADE_LEVELS, NIGERIAN_STATES, STATE_ALIASES,
+    APPOINTMENT_TYPE_ALIASES, EMPLOYEE_STATUS_ALIASES, SALARY_STRUCTURE_ALIASES,
+    QUALIFICATION_LEVELS, QUALIFICATION_ALIASES, QUALIFICATION_PREFIXES, PFA_KEYWORDS,
+)
+
+# Roll column (normalised header) -> hr.employee field
+HEADER_ALIASES = {
+    'file_number': 'file_number',
+    'file_no': 'file_number',
+    'ippis': 'ippis',
+    'ippis_number': 'ippis',
+    'surname': 'surname',
+    'first_name': 'first_name',
+    'middle_name': 'middle_name',
+    'name': 'name',
+    'dob': 'birthday',
+    'date_of_birth': 'birthday',
+    'birthday': 'birthday',
+    'sex': 'gender',
+    'gender': 'gender',
+    'department': 'department',
+    'department_id': 'department',
+    'department_id_id': 'department_xmlid',
+    'rank': 'rank',
+    'salary_grade_level': 'salary_grade_level',
+    'type_of_apptmt': 'appointment_type',
+    'appointment_type': 'appointment_type',
+    'date_of_f_appntmt': 'date_first_appointment',
+    'date_first_appointment': 'date_first_appointment',
+    'date_of_prssnt_appnt': 'date_present_appointment',
+    'date_present_appointment': 'date_present_appointment',
+    'pfa_name': 'pfa_name',
+    'pfa_name_text': 'pfa_name',
+    'rsa_pin': 'rsa_pin',
+    'email': 'work_email',
+    'work_email': 'work_email',
+    'state': 'state_of_origin',
+    'state_of_origin': 'state_of_origin',
+    'lga': 'lga',
+    'remark': 'remark',
+    'status': 'employee_status',
+    'employee_status': 'employee_status',
+    'qualification': 'qualification',
+    'nature_of_desc_of_job': 'nature_of_desc',
+    'nature_of_desc': 'nature_of_desc',
+    'job_description': 'job_description',
+    'salary_structure': 'salary_structure',
+}
+
+# hr.employee fields a roll row can set; editing any of them outside a sync
+# invalidates the stored roll hash
+ROLL_FIELDS = [
+    'file_number', 'ippis', 'surname', 'first_name', 'middle_name', 'name', 'birthday',
+    'gender', 'department_id', 'rank', 'salary_grade_level', 'appointment_type',
+    'date_first_appointment', 'date_present_appointment', 'pfa_name', 'rsa_pin',
+    'work_email', 'state_of_origin', 'lga', 'remark', 'employee_status', 'qualification',
+    'nature_of_desc', 'job_description', 'salary_structure',
+]
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d-%b-%Y', '%d/%m/%y', '%Y/%m/%d')
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_GRADE_PATTERN = re.compile(r'^([a-z]+)0*(\d+)$')
+
+
+def normalise_key(value):
+    """Lower-case a header or cell and collapse punctuation to underscores."""
+    return _NON_ALNUM.sub('_', str(value or '').strip().lower()).strip('_')
+
+
+def grade_signature(value):
+    """Split a grade key or label into (structure, numeric level), e.g. ('conhess', 7)."""
+    match = _GRADE_PATTERN.match(normalise_key(value).replace('_', ''))
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+_GRADE_LOOKUP = {grade_signature(code): code for code, _label in SALARY_GRADE_LEVELS}
+_STATE_LOOKUP = dict(
+    [(code, code) for code, _label in NIGERIAN_STATES]
+    + [(normalise_key(label), code) for code, label in NIGERIAN_STATES]
+    + list(STATE_ALIASES.items())
+)
+
+
+def normalise_grade(value):
+    """Map 'CONHESS 07', 'conhess_07' or 'contopsal_04' to a salary grade key."""
+    return _GRADE_LOOKUP.get(grade_signature(value)) if value else False
+
+
+def normalise_state(value):
+    return _STATE_LOOKUP.get(normalise_key(value), False) if value else False
+
+
+def normalise_selection(value, selection, aliases=None):
+    """Match a cell against a selection by key or label, then by alias."""
+    if not value:
+        return False
+    key = normalise_key(value)
+    for sel_key, sel_label in selection:
+        if key in (sel_key, normalise_key(sel_label)):
+            return sel_key
+    return (aliases or {}).get(key, False)
+
+
+def normalise_appointment_type(value, selection):
+    return normalise_selection(value, selection, APPOINTMENT_TYPE_ALIASES)
+
+
+def normalise_employee_status(value, selection):
+    return normalise_selection(value, selection, EMPLOYEE_STATUS_ALIASES)
+
+
+def normalise_salary_structure(value, selection):
+    return normalise_selection(value, selection, SALARY_STRUCTURE_ALIASES)
+
+
+def normalise_identifier(value):
+    """Clean an IPPIS or file number cell (spreadsheets turn 208296 into 208296.0)."""
+    if value in (None, False, ''):
+        return False
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or False
+
+
+def normalise_rsa_pin(value):
+    """Canonical RSA PIN: upper case with spaces and dashes removed."""
+    if not value:
+        return False
+    return re.sub(r'[\s\-]+', '', str(value)).upper() or False
+
+
+_QUALIFICATION_RANK = {level: rank for rank, (level, _label) in enumerate(QUALIFICATION_LEVELS)}
+_LETTERS = re.compile(r'[A-Z]+')
+_QUALIFICATION_SEPARATORS = re.compile(r'[,;/&()+]')
+
+
+def _qualification_words(value):
+    """'B.Sc (ed), MBA' -> ['BSC', 'ED', 'MBA']; spaced initials are joined ('B S C', 'B PHARM')."""
+    words = []
+    for part in _QUALIFICATION_SEPARATORS.split(str(value).upper().replace('.', '')):
+        pending = ''
+        for word in _LETTERS.findall(part):
+            if len(word) == 1:
+                pending += word
+            elif len(pending) == 1:
+                words.append(pending + word)
+                pending = ''
+            else:
+                if pending:
+                    words.append(pending)
+                words.append(word)
+                pending = ''
+        if pending:
+            words.append(pending)
+    return words
+
+
+@lru_cache(maxsize=4096)
+def normalise_qualification_level(value):
+    """
+    Highest qualification level of a free-text cell ('MBBS, FELLOWSHIP (FMCS) FICS' -> 'fellowship').
+    Unrecognised text is 'other'; cached per distinct raw value.
+    """
+    if not value or not str(value).strip():
+        return False
+    levels = set()
+    for word in _qualification_words(value):
+        level = QUALIFICATION_ALIASES.get(word)
+        if not level:
+            level = next((level for prefix, level in QUALIFICATION_PREFIXES if word.startswith(prefix)), None)
+        if level:
+            levels.add(level)
+    if not levels:
+        return 'other'
+    return min(levels, key=_QUALIFICATION_RANK.get)
+
+
+@lru_cache(maxsize=1024)
+def normalise_pfa(value):
+    """XML id (in this module) of the PFA partner named by a free-text cell, or False."""
+    words = set(normalise_key(value).split('_')) if value else set()
+    for keywords, xmlid in PFA_KEYWORDS:
+        if words.issuperset(keywords):
+            return xmlid
+    return False
+
+
+def parse_date(value):
+    """Parse a roll date cell; raises ValueError on unrecognised input."""
+    if value in (None, False, ''):
+        return False
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def build_name(surname, first_name, middle_name):
+    """Nigerian naming convention used by HrEmployee.create/write."""
+    return ' '.join(part for part in (surname, first_name, middle_name) if part)
+
+
+def content_hash(vals):
+    """Stable digest of normalised create/write vals, used to skip unchanged rows."""
+    payload = json.dumps(vals, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _map_header(header):
+    return [HEADER_ALIASES.get(normalise_key(column)) for column in header]
+
+
+def _iter_csv(content):
+    stream = io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = _map_header(header)
+    for row in reader:
+        yield {field: cell.strip() for field, cell in zip(fields, row) if field and cell.strip()}
+
+
+def _iter_xlsx(content):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("The openpyxl library is required to read XLSX files.")
+    workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        fields = _map_header(header)
+        for row in rows:
+            values = {}
+            for field, cell in zip(fields, row):
+                if not field or cell in (None, ''):
+                    continue
+                values[field] = cell.strip() if isinstance(cell, str) else cell
+            if values:
+                yield values
+    finally:
+        workbook.close()
+
+
+def iter_roll_rows(content, filename):
+    """Yield one dict of raw cells per roll row, keyed by hr.employee field."""
+    if (filename or '').lower().endswith(('.xlsx', '.xlsm')):
+        return _iter_xlsx(content)
+    return _iter_csv(content)
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items without materialising the input."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_projection
+from . import test_employee_snapshot
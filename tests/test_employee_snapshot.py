@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestEmployeeSnapshot(TransactionCase):
+
+    def _periods(self, employee):
+        return [
+            (snapshot.date_from, snapshot.date_to, snapshot.rank, snapshot.department_id)
+            for snapshot in employee.snapshot_ids.sorted('date_from')
+        ]
+
+    def _write_on(self, employee, day, vals):
+        employee.with_context(mda_hr_snapshot_date=day).write(vals)
+
+    def test_backdated_change_splits_the_periods(self):
+        """A change dated before the open period splits the one valid then and keeps later values"""
+        department = self.env['hr.department'].create({'name': 'Audit'})
+        employee = self.env['hr.employee'].with_context(mda_hr_snapshot_date=date(2020, 1, 1)).create({
+            'name': 'Ada Obi',
+            'rank': 'Officer II',
+            'date_first_appointment': date(2020, 1, 1),
+        })
+        self._write_on(employee, date(2023, 1, 1), {'rank': 'Officer I'})
+        self._write_on(employee, date(2022, 1, 1), {'department_id': department.id})
+
+        no_department = self.env['hr.department']
+        self.assertEqual(self._periods(employee), [
+            (date(2020, 1, 1), date(2022, 1, 1), 'Officer II', no_department),
+            (date(2022, 1, 1), date(2023, 1, 1), 'Officer II', department),
+            (date(2023, 1, 1), False, 'Officer I', department),
+        ])
+
+        # Dated on the start of the open period: its values are replaced
+        self._write_on(employee, date(2023, 1, 1), {'rank': 'Senior Officer'})
+        self.assertEqual(self._periods(employee)[-1], (date(2023, 1, 1), False, 'Senior Officer', department))
+        self.assertEqual(len(employee.snapshot_ids), 3)
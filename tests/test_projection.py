@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import BaseCase, tagged
+
+from ..projection import project_workforce, year_fraction
+
+
+@tagged('post_install', '-at_install')
+class TestProjectWorkforce(BaseCase):
+
+    def test_retirements_due_by_start_year_leave_service(self):
+        """Staff retiring in the start year, or already past retirement, are not projected in service"""
+        columns = {
+            'grade': [0, 0, 0],
+            'last_promotion': [2020.0, 2020.0, 2020.0],
+            'confirmed': [2021.0, 2021.0, 2021.0],
+            'retirement': [year_fraction(date(2026, 11, 1)), year_fraction(date(2024, 3, 1)), None],
+        }
+        rows = project_workforce(columns, [(30, -1)], start_year=2026, years=3)
+        headcount = {year: count for year, _grade, count, _due, _promoted, _retired in rows}
+        retirements = {year: retired for year, _grade, _count, _due, _promoted, retired in rows}
+        self.assertEqual(retirements[2027], 0)
+        self.assertEqual(headcount, {2027: 1, 2028: 1, 2029: 1})